@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from email.mime.base import MIMEBase
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+def render_cover_letter_docx(cover_letter_text):
+    from docx import Document as DocxDocument
+
+    cover_letter_doc = DocxDocument()
+    for line in cover_letter_text.split('\n'):
+        cover_letter_doc.add_paragraph(line)
+    cover_letter_io = BytesIO()
+    cover_letter_doc.save(cover_letter_io)
+    return cover_letter_io.getvalue()
+
+class AttachmentStore:
+    """Attachments keyed by content hash, each rendered and base64-encoded only once.
+
+    Every message (and every retry) that carries the same file reuses the encoded
+    payload. The least recently used attachments are dropped once the encoded
+    payloads exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def _store(self, key, filename, mime_type, data):
+        # MIME-style base64: 76-character lines, exactly what encoders.encode_base64 produces
+        item = {"filename": filename, "mime_type": mime_type, "encoded": base64.encodebytes(data).decode("ascii")}
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = item
+                self.size += len(item["encoded"])
+            while self.size > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted["encoded"])
+        return key
+
+    def add_bytes(self, data, filename, mime_type='application/octet-stream'):
+        key = hashlib.sha256(b"%s\0%s\0" % (filename.encode(), mime_type.encode()) + data).hexdigest()
+        if self._lookup(key) is None:
+            self._store(key, filename, mime_type, data)
+        return key
+
+    def add_cover_letter(self, cover_letter_text, filename="Cover_Letter.docx"):
+        """Render the cover letter to DOCX once per distinct text."""
+        key = hashlib.sha256(f"cover-letter\0{filename}\0{cover_letter_text}".encode("utf-8")).hexdigest()
+        if self._lookup(key) is None:
+            self._store(key, filename, DOCX_MIME, render_cover_letter_docx(cover_letter_text))
+        return key
+
+    def mime_part(self, key):
+        """A fresh MIME part around the already-encoded payload (no re-encoding)."""
+        item = self._lookup(key)
+        if item is None:
+            raise KeyError(f"Attachment {key} is no longer in the store")
+        part = MIMEBase(*item["mime_type"].split("/", 1))
+        part.set_payload(item["encoded"])
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.add_header('Content-Disposition', 'attachment', filename=item["filename"])
+        return part
@@ -0,0 +1,173 @@
+# ================== batch.py (Headless Batch Mode) ==================
+"""Run the individual pipeline over a file of job URLs without the Streamlit UI.
+
+    python batch.py --resume resume.pdf --jobs jobs.csv --out results.jsonl --concurrency 16
+
+The jobs file is either a CSV with a ``url`` column (or URLs in the first column)
+or a JSONL file with a ``url`` key per line. One JSON result is appended to the
+output file as soon as each job finishes.
+
+Stage outputs are checkpointed, so rerunning the same command after a crash skips the
+URLs already in the output file and resumes the rest from their last finished stage.
+"""
+import os
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from chains import IndividualChain
+from checkpoints import get_checkpoints
+from ledger import get_ledger
+from ratelimit import RateLimiter
+from resume import ResumeParser
+from pipeline import individual_pipeline
+from tracing import trace
+
+load_dotenv()
+
+# ----------------- INPUT -----------------
+def read_job_urls(path):
+    urls = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    urls.append(json.loads(line)["url"])
+        else:
+            reader = csv.reader(f)
+            rows = [row for row in reader if row]
+            if rows and "url" in [c.strip().lower() for c in rows[0]]:
+                col = [c.strip().lower() for c in rows[0]].index("url")
+                rows = rows[1:]
+            else:
+                col = 0
+            urls = [row[col].strip() for row in rows if row[col].strip()]
+    return urls
+
+def read_done_urls(path):
+    """URLs that already have a successful record in the output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partly written last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("url"))
+    return done
+
+# ----------------- PIPELINE -----------------
+class BatchRunner:
+    def __init__(self, chain, resume, groq_rpm=30, hunter_rpm=500, fetch_rpm=0, ledger=None, checkpoints=None):
+        self.chain = chain
+        self.resume = resume
+        self.ledger = ledger
+        self.checkpoints = checkpoints
+        self.limits = {"fetch": RateLimiter.per_minute(fetch_rpm)}
+        # Acquired on every model request, so cascade escalations count against the quota too
+        chain.limiter = RateLimiter.per_minute(groq_rpm)
+        chain.hunter.limiter = RateLimiter.per_minute(hunter_rpm, burst=15)
+
+    def process(self, url):
+        """Run every stage for one job URL and return a JSON-serializable record."""
+        started = time.monotonic()
+        record = {"url": url}
+        with trace("batch_job", url=url) as collected:
+            run = individual_pipeline(self.chain, url, lambda: self.resume, limits=self.limits, ledger=self.ledger).start(
+                checkpoints=self.checkpoints)
+            try:
+                results = run.wait()
+                page = results["page"]
+                record.update(
+                    status="ok",
+                    tokens={"before": page["tokens_before"], "after": page["tokens_after"]},
+                    job=results["job"],
+                    recruiter_email=results["recruiter_email"] or "",
+                    cover_letter=results["cover_letter"],
+                    cold_email=results["cold_email"],
+                )
+                if self.ledger is not None:
+                    duplicate = results["duplicate"]
+                    record.update(
+                        posting_id=results["ledger"],
+                        reused=bool(results["previous"]),
+                        duplicate_of=duplicate and {"url": duplicate["url"], "similarity": duplicate["similarity"]},
+                    )
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["timings"] = {name: round(seconds, 3) for name, seconds in run.timings.items()}
+        record["restored"] = sorted(run.restored)
+        llm = collected.summary().get("llm", {})
+        record["llm"] = {key: llm.get(key, 0) for key in ("count", "prompt_tokens", "completion_tokens", "cache_hits")}
+        record["trace_id"] = collected.trace_id
+        record["elapsed"] = round(time.monotonic() - started, 3)
+        return record
+
+    def run(self, urls, out_path, concurrency=8):
+        """Process `urls` concurrently, appending each record to `out_path` as it completes."""
+        done = failed = 0
+        with open(out_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(self.process, url) for url in urls]
+            for future in as_completed(futures):
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                done += 1
+                failed += record["status"] != "ok"
+                print(f"[{done}/{len(urls)}] {record['status']:5} {record['elapsed']:7.2f}s {record['url']}")
+        return done, failed
+
+# ----------------- CLI -----------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate cover letters and cold emails for a list of job URLs.")
+    parser.add_argument("--resume", required=True, help="Resume file (.pdf, .docx or .txt)")
+    parser.add_argument("--jobs", required=True, help="CSV (url column) or JSONL (url key) of job URLs")
+    parser.add_argument("--out", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=8, help="Jobs processed at the same time")
+    parser.add_argument("--groq-rpm", type=float, default=30, help="Max Groq requests per minute (0 = unlimited)")
+    parser.add_argument("--hunter-rpm", type=float, default=500, help="Max Hunter.io requests per minute (0 = unlimited)")
+    parser.add_argument("--fetch-rpm", type=float, default=0, help="Max job page fetches per minute (0 = unlimited)")
+    parser.add_argument("--no-ledger", action="store_true",
+                        help="Regenerate postings already in the ledger and don't record this run in it")
+    parser.add_argument("--no-checkpoints", action="store_true",
+                        help="Recompute every stage and process URLs already completed in --out again")
+    args = parser.parse_args(argv)
+
+    urls = read_job_urls(args.jobs)
+    if not args.no_checkpoints:
+        done = read_done_urls(args.out)
+        if done:
+            print(f"Skipping {len(done & set(urls))} URLs already completed in {args.out}")
+            urls = [url for url in urls if url not in done]
+    chain = IndividualChain()
+    runner = BatchRunner(
+        chain,
+        ResumeParser().parse_file(args.resume),
+        groq_rpm=args.groq_rpm,
+        hunter_rpm=args.hunter_rpm,
+        fetch_rpm=args.fetch_rpm,
+        ledger=None if args.no_ledger else get_ledger(),
+        checkpoints=None if args.no_checkpoints else get_checkpoints(),
+    )
+    started = time.monotonic()
+    done, failed = runner.run(urls, args.out, concurrency=args.concurrency)
+    print(f"Finished {done} jobs ({failed} failed) in {time.monotonic() - started:.1f}s -> {args.out}")
+    if runner.checkpoints is not None:
+        stats = runner.checkpoints.stats()
+        print(f"Checkpoints: {stats['restored']} stages restored, {stats['computed']} computed")
+    if runner.ledger is not None:
+        stats = runner.ledger.stats()
+        print(f"Ledger: {stats['duplicates']} of {stats['lookups']} postings already seen, {stats['postings']} stored")
+    for route, stats in chain.cascade.stats().items():
+        print(f"Extraction ({route}): {stats['calls']} calls, {stats['escalation_rate']:.0%} escalated, served by {stats['served_by']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# ================== benchmarks/corpus.py (Synthetic Inputs) ==================
+import csv
+import random
+
+# Careers pages of increasing size: name → number of postings
+PAGE_SIZES = {"single": 1, "small": 5, "medium": 20, "large": 60}
+
+ROLES = ["Data Engineer", "Backend Developer", "ML Engineer", "Frontend Developer", "DevOps Engineer",
+         "Product Analyst", "Site Reliability Engineer", "Mobile Developer", "Security Engineer", "QA Engineer"]
+LEVELS = ["Junior", "", "Senior", "Staff", "Lead"]
+SKILLS = ["Python", "SQL", "Spark", "Kafka", "AWS", "GCP", "Docker", "Kubernetes", "React", "TypeScript",
+          "Go", "Java", "Terraform", "PyTorch", "TensorFlow", "Airflow", "Postgres", "Redis", "Swift", "Kotlin"]
+FIRST_NAMES = ["Alex", "Priya", "Sam", "Maria", "Chen", "Fatima", "Jordan", "Lena", "Omar", "Grace"]
+LAST_NAMES = ["Kim", "Patel", "Garcia", "Nguyen", "Smith", "Okafor", "Rossi", "Haddad", "Silva", "Brown"]
+FILLER = ("You will work with a small team to design, build and operate services used by thousands of customers. "
+          "We value ownership, clear writing and pragmatic engineering. ")
+
+def _boilerplate(rng):
+    """Navigation, cookie banner, scripts and footer that extraction is expected to drop."""
+    links = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40))
+    script = "var tracking = {" + ",".join(f'"k{i}": {rng.random():.6f}' for i in range(200)) + "};"
+    return (
+        f"<nav><ul>{links}</ul></nav>"
+        '<div class="cookie-consent">We use cookies to improve your experience. <button>Accept</button></div>'
+        f"<script>{script}</script><style>body {{ font-family: sans-serif; }}</style>",
+        f'<footer><ul>{links}</ul><p>© Example Corp. All rights reserved.</p></footer>',
+    )
+
+def make_job(rng, company, number=0):
+    role = " ".join(filter(None, [rng.choice(LEVELS), rng.choice(ROLES)]))
+    return {
+        "role": role,
+        "company": company,
+        "experience": f"{rng.randint(1, 10)}+ years",
+        "skills": rng.sample(SKILLS, rng.randint(3, 6)),
+        "description": f"Requisition {company}-{number:04d}. " + FILLER * rng.randint(1, 4),
+        "recruiter": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    }
+
+def make_posting(rng, number, words=120):
+    """A posting with its own random description, as in a large ledger of unrelated jobs."""
+    vocabulary = [f"{syllable}{i}" for i, syllable in enumerate(("ka", "lo", "mi", "tas", "ren", "vo", "dul", "pe") * 250)]
+    return {
+        "role": " ".join(filter(None, [rng.choice(LEVELS), rng.choice(ROLES)])),
+        "company_name": f"Company{number % 5000}",
+        "description": " ".join(rng.choice(vocabulary) for _ in range(words)),
+        "skills": rng.sample(SKILLS, 4),
+    }
+
+def repost(rng, job):
+    """The same posting as a job board would repost it: a new intro line and a few edited words."""
+    words = job["description"].split()
+    for i in rng.sample(range(len(words)), 3):
+        words[i] = words[i].upper()
+    return {**job, "description": "Posted 3 days ago. " + " ".join(words) + " Apply now."}
+
+def make_careers_page(n_jobs, seed=0, company=None):
+    """A careers page with `n_jobs` postings wrapped in realistic boilerplate."""
+    rng = random.Random(seed)
+    company = company or f"Company{seed}"
+    header, footer = _boilerplate(rng)
+    postings = []
+    for number in range(n_jobs):
+        job = make_job(rng, company, number)
+        postings.append(
+            f"<article class=\"job\"><h2>{job['role']}</h2>"
+            f"<p>Company: {job['company']}</p>"
+            f"<p>Experience: {job['experience']}</p>"
+            f"<p>Skills: {', '.join(job['skills'])}</p>"
+            f"<p>Description: {job['description'].strip()}</p>"
+            f"<p>Recruiter: {job['recruiter']}</p></article>"
+        )
+    return (
+        f"<html><head><title>Careers at {company}</title></head><body>{header}"
+        f"<main><h1>Careers at {company}</h1>{''.join(postings)}</main>{footer}</body></html>"
+    )
+
+def make_corpus(seed=0, sizes=None):
+    """{page name: html} for every size in `sizes` (default PAGE_SIZES)."""
+    sizes = sizes or PAGE_SIZES
+    return {name: make_careers_page(n_jobs, seed=seed + i, company=f"Company{seed + i}")
+            for i, (name, n_jobs) in enumerate(sizes.items())}
+
+def write_portfolio_csv(path, rows=200, seed=0):
+    """Portfolio CSV in the app's Techstack/Links format."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Techstack", "Links"])
+        for i in range(rows):
+            writer.writerow([", ".join(rng.sample(SKILLS, 3)), f"https://example.com/portfolio/{i}"])
+    return path
+
+RESUME_TEXT = """Jamie Rivera
+jamie.rivera@example.com | (312) 555-0199 | linkedin.com/in/jamie-rivera
+
+Summary
+Software engineer focused on data platforms and backend services.
+
+Skills
+Languages: Python, SQL, Go
+Tools: Spark, Kafka, Airflow, Docker, Kubernetes, AWS
+
+Experience
+• Built a streaming ingestion service processing 2 billion events per day with Kafka and Spark.
+• Cut warehouse costs by 35% by rewriting nightly batch jobs as incremental Airflow pipelines.
+• Led the migration of twelve services to Kubernetes with zero customer-facing downtime.
+
+Education
+B.S. Computer Science
+"""
@@ -0,0 +1,218 @@
+# ================== benchmarks/fakes.py (Local Stand-ins) ==================
+import re
+import json
+import time
+import random
+import hashlib
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+# ----------------- LLM -----------------
+class FakeMessage:
+    """Just enough of a LangChain AIMessage/AIMessageChunk for the chains."""
+
+    def __init__(self, content, input_tokens=0, output_tokens=0):
+        self.content = content
+        self.response_metadata = {}
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+def _job_blocks(text):
+    """Postings in extracted careers-page text: a "## Role" heading followed by "Key: value" lines."""
+    # Windowed extraction flattens newlines, so restore the line structure first
+    text = re.sub(r"(^|\s)(#{1,6} )", r"\n\2", text)
+    text = re.sub(r"\s+(Company|Experience|Skills|Description|Recruiter): ", r"\n\1: ", text)
+    jobs = []
+    for block in re.split(r"^#+ ", text, flags=re.M)[1:]:
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        fields = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+        if "Company" not in fields:
+            continue
+        jobs.append({
+            "role": lines[0],
+            "experience": fields.get("Experience", ""),
+            "skills": [s.strip() for s in fields.get("Skills", "").split(",") if s.strip()],
+            "description": fields.get("Description", ""),
+            "company_name": fields["Company"],
+            "recruiter_name": fields.get("Recruiter", ""),
+        })
+    return jobs
+
+class FakeLLM:
+    """Deterministic stand-in for ChatGroq with a fixed time to first token and token rate.
+
+    Extraction prompts get JSON built from the postings in the prompt, so the chains parse
+    real-looking output; every other prompt gets `output_tokens` words of filler prose. A
+    fraction `invalid_rate` of extraction responses use the wrong key names, as small models do.
+    """
+
+    WORDS = ("we", "build", "reliable", "data", "platforms", "for", "teams", "that", "ship", "quickly",
+             "our", "experience", "with", "python", "cloud", "and", "machine", "learning", "helps", "clients")
+
+    def __init__(self, model_name="fake-llm", temperature=0, first_token_latency=0.3,
+                 tokens_per_second=250.0, output_tokens=200, invalid_rate=0.0, seed=0):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.invalid_rate = invalid_rate
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        with self._lock:
+            self.calls += 1
+        rng = random.Random(hashlib.sha256(f"{self.seed}\0{prompt}".encode()).digest())
+        if "extract the job postings" in prompt or "Extract job details" in prompt:
+            jobs = _job_blocks(prompt)
+            if rng.random() < self.invalid_rate:
+                jobs = [{key.replace("_", " ").title(): value for key, value in job.items()} for job in jobs]
+            if "Extract job details" in prompt:
+                return json.dumps({**jobs[0], "recruiter_email": ""} if jobs else {})
+            return json.dumps(jobs)
+        words = [rng.choice(self.WORDS) for _ in range(self.output_tokens)]
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        return "Hello,\n\n" + "\n".join(lines) + "\n\nBest Regards,\nBenchmark Bot"
+
+    def _delay(self, tokens):
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def invoke(self, prompt):
+        content = self._respond(str(prompt))
+        tokens = len(content.split())
+        time.sleep(self.first_token_latency + self._delay(tokens))
+        return FakeMessage(content, len(str(prompt)) // 4, tokens)
+
+    def stream(self, prompt):
+        content = self._respond(str(prompt))
+        time.sleep(self.first_token_latency)
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self._delay(1))
+            yield FakeMessage(word if i == len(words) - 1 else word + " ")
+
+# ----------------- EMBEDDINGS -----------------
+class HashEmbeddingFunction(EmbeddingFunction):
+    """Bag-of-words hashed into a fixed-size unit vector; no model download needed."""
+
+    def __init__(self, dimensions=128):
+        self.dimensions = dimensions
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dimensions, dtype=np.float32)
+            for word in re.findall(r"\w+", text.lower()):
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+            vectors.append(vector / (np.linalg.norm(vector) or 1.0))
+        return vectors
+
+    @staticmethod
+    def name():
+        return "benchmark-hash"
+
+    def get_config(self):
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbeddingFunction(**config)
+
+# ----------------- HTTP SERVERS -----------------
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def reply(self, code, body, content_type="application/json", headers=None):
+        time.sleep(self.latency)
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeServer:
+    """A threaded HTTP server on a free local port, running in a daemon thread."""
+
+    def __init__(self, handler, latency=0.0, **attrs):
+        handler = type(handler.__name__, (handler,), {"latency": latency, **attrs})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.handler = handler
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class HunterHandler(_Handler):
+    """Answers /v2/domain-search and /v2/email-finder like Hunter.io; "Unknown*" companies have no domain."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith("/domain-search"):
+            company = query.get("company", "")
+            if company.startswith("Unknown"):
+                return self.reply(404, b'{"errors": [{"id": "not_found"}]}')
+            data = {"domain": re.sub(r"[^a-z0-9]", "", company.lower()) + ".com"}
+        elif url.path.endswith("/email-finder"):
+            first = (query.get("full_name") or "x").split()[0].lower()
+            data = {"email": f"{first}@{query.get('domain')}", "score": 90}
+        else:
+            return self.reply(404, b"{}")
+        self.reply(200, json.dumps({"data": data}).encode())
+
+class GmailHandler(_Handler):
+    """Accepts users.messages.send, both direct and through the /batch/gmail/v1 multipart endpoint."""
+
+    ids = itertools.count(1)
+    sent = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/batch"):
+            boundary = re.search(r'boundary="?([^";]+)', self.headers["Content-Type"]).group(1)
+            responses = []
+            for part in body.decode().split("--" + boundary):
+                content_id = re.search(r"Content-ID: <([^>]+)>", part)
+                if not content_id:
+                    continue
+                self.sent.append(len(part))
+                payload = json.dumps({"id": f"m{next(self.ids)}"})
+                responses.append(
+                    f"--B\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id.group(1)}>\r\n\r\n"
+                    f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{payload}\r\n"
+                )
+            return self.reply(200, ("".join(responses) + "--B--\r\n").encode(), "multipart/mixed; boundary=B")
+        self.sent.append(len(body))
+        self.reply(200, json.dumps({"id": f"m{next(self.ids)}"}).encode())
+
+class SiteHandler(_Handler):
+    """Serves the careers-page corpus at /<name>.html, with an ETag and 304s for unchanged pages."""
+
+    pages = {}
+
+    def do_GET(self):
+        html = self.pages.get(urlparse(self.path).path.strip("/").removesuffix(".html"))
+        if html is None:
+            return self.reply(404, b"not found", "text/plain")
+        body = html.encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", "text/html; charset=utf-8", headers={"ETag": etag})
+        self.reply(200, body, "text/html; charset=utf-8", headers={"ETag": etag})
@@ -0,0 +1,101 @@
+# ================== benchmarks/importtime.py (Cold-Start Import Report) ==================
+"""Import cost of the app's modules, measured with `python -X importtime` in fresh interpreters.
+
+"landing" is everything main.py imports at top level, i.e. what a new Streamlit worker loads
+before it can draw the landing page. Each app module is then measured on its own.
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget-ms 800       # exit 1 if the landing imports get slower
+    python -m benchmarks.importtime --save                 # also write benchmarks/results/importtime-*.json
+"""
+import os
+import re
+import ast
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+APP_MODULES = ("tracing", "cache", "utils", "clients", "pages", "pipeline", "routing", "hunter", "chains",
+               "crawler", "portfolio", "resume", "attachments", "outbox", "jobs")
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S.*)$")
+
+def landing_imports(path=os.path.join(ROOT, "main.py")):
+    """The import statements main.py runs at module level, as one line of code."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    statements = [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "; ".join(statements)
+
+def importtime(code):
+    """Run `code` under -X importtime in a fresh interpreter: [(module, self_us, cumulative_us, depth)]."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module.strip(), int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def measure(code, repeat):
+    """Median total import time in ms over `repeat` runs, plus the module breakdown of the median run."""
+    runs = []
+    for _ in range(repeat):
+        rows = importtime(code)
+        total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+        runs.append((total_ms, rows))
+    runs.sort(key=lambda run: run[0])
+    return runs[len(runs) // 2]
+
+def heaviest(rows, top):
+    """Top-level third-party packages by cumulative import time, in ms."""
+    packages = {}
+    for module, _, cumulative, _ in rows:
+        package = module.split(".")[0]
+        if "." not in module:
+            packages[package] = max(packages.get(package, 0), cumulative)
+    return sorted(((name, round(us / 1000, 1)) for name, us in packages.items()), key=lambda item: -item[1])[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how long the app's imports take on a cold start.")
+    parser.add_argument("--modules", default=",".join(APP_MODULES), help="Comma-separated app modules to measure on their own")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per measurement; the median is reported")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list per measurement")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Exit 1 if the landing imports take longer than this")
+    parser.add_argument("--save", action="store_true", help="Write the report to benchmarks/results/")
+    args = parser.parse_args(argv)
+
+    targets = {"landing": landing_imports()}
+    targets.update({name: f"import {name}" for name in filter(None, args.modules.split(","))})
+
+    report = {"python": sys.version.split()[0], "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "imports": {}}
+    for name, code in targets.items():
+        total_ms, rows = measure(code, args.repeat)
+        packages = heaviest(rows, args.top)
+        report["imports"][name] = {"total_ms": round(total_ms, 1), "modules": len(rows), "heaviest": packages}
+        print(f"\n== {name}: {total_ms:.1f} ms, {len(rows)} modules")
+        for package, ms in packages:
+            print(f"   {package:<32} {ms:>9.1f} ms")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"importtime-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {path}")
+
+    landing_ms = report["imports"]["landing"]["total_ms"]
+    if args.budget_ms is not None and landing_ms > args.budget_ms:
+        print(f"\nLanding imports took {landing_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+# ================== benchmarks/run.py (Offline Benchmark Harness) ==================
+"""Offline benchmarks for the extraction, generation, lookup and send paths.
+
+Groq, Hunter.io, Gmail and the careers pages are replaced by the local fakes in
+benchmarks/fakes.py, so runs are repeatable and need no network or API keys:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --compare benchmarks/results/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import math
+import random
+import argparse
+import tempfile
+import platform
+import threading
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# The chains build real Groq clients before the fakes are swapped in; they never make a request
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from benchmarks.corpus import PAGE_SIZES, RESUME_TEXT, make_corpus, make_posting, repost, write_portfolio_csv
+from benchmarks.fakes import FakeLLM, FakeServer, GmailHandler, HashEmbeddingFunction, HunterHandler, SiteHandler
+from cache import DiskCache
+from chains import Chain, IndividualChain
+from hunter import HunterClient
+from ledger import Ledger
+from outbox import GmailService, Outbox, OutboxWorker
+from pages import PageCache
+from pipeline import individual_pipeline, organization_outreach
+from portfolio import Portfolio
+from resume import ResumeParser
+from utils import clean_text, extract_page_text
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# ----------------- MEASUREMENT -----------------
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+class Recorder:
+    """Collects per-stage latencies from any thread."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def summary(self):
+        return {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3),
+            }
+            for stage, values in self.samples.items()
+        }
+
+# ----------------- ENVIRONMENT -----------------
+class BenchEnv:
+    """Fake servers, fake models and fresh caches shared by all scenarios of one run."""
+
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.corpus = make_corpus(seed=args.seed, sizes=PAGE_SIZES)
+        self.site = FakeServer(SiteHandler, latency=args.http_latency / 1000, pages=self.corpus)
+        self.hunter_server = FakeServer(HunterHandler, latency=args.hunter_latency / 1000)
+        self.gmail_server = FakeServer(GmailHandler, latency=args.gmail_latency / 1000, sent=[])
+        self.urls = {name: f"{self.site.url}/{name}.html" for name in self.corpus}
+        self.portfolio_csv = write_portfolio_csv(os.path.join(workdir, "portfolio.csv"), rows=args.portfolio_rows, seed=args.seed)
+        self.texts = {}
+        self.jobs = []
+
+    def llm(self, model_name, temperature=0, speedup=1.0, invalid_rate=0.0):
+        args = self.args
+        return FakeLLM(model_name=model_name, temperature=temperature, first_token_latency=args.llm_latency / 1000 / speedup,
+                       tokens_per_second=args.tokens_per_second * speedup, output_tokens=args.output_tokens,
+                       invalid_rate=invalid_rate, seed=args.seed)
+
+    def cascade_llm(self, model_name, temperature=0):
+        # The small model answers faster but sometimes gets the schema wrong
+        if "8b" in model_name:
+            return self.llm(model_name, temperature, speedup=3.0, invalid_rate=self.args.small_model_error_rate)
+        return self.llm(model_name, temperature)
+
+    def llm_cache(self, name):
+        return DiskCache(os.path.join(self.workdir, f"{name}.sqlite"), enabled=self.args.llm_cache)
+
+    def hunter(self):
+        return HunterClient(api_key="benchmark", base_url=f"{self.hunter_server.url}/v2",
+                            cache=DiskCache(os.path.join(self.workdir, f"hunter-{time.monotonic_ns()}.sqlite")),
+                            rate_per_minute=0)
+
+    def chain(self):
+        chain = Chain(cache=self.llm_cache("llm-org"))
+        chain.llm = self.llm("fake-70b")
+        chain.cascade.llm_factory = self.cascade_llm
+        return chain
+
+    def individual_chain(self):
+        chain = IndividualChain(cache=self.llm_cache("llm-individual"))
+        chain.cascade.llm_factory = self.cascade_llm
+        chain.client = self.llm("fake-8b", temperature=0.7)
+        chain.hunter = self.hunter()
+        return chain
+
+    def close(self):
+        for server in (self.site, self.hunter_server, self.gmail_server):
+            server.close()
+
+# ----------------- SCENARIOS -----------------
+# Each scenario returns the number of items it processed; throughput is items / wall time.
+def bench_extract_text(env, rec):
+    """Raw regex cleanup vs. structured main-content extraction on every page."""
+    items = 0
+    for _ in range(env.args.repeat):
+        for name, html in env.corpus.items():
+            with rec.time("clean_text"):
+                clean_text(html)
+            with rec.time("extract_page_text"):
+                env.texts[name] = extract_page_text(html)["text"]
+            items += 1
+    return items
+
+def bench_load_page(env, rec):
+    """Download + extraction on a cold cache, then a 304 revalidation, then a fresh hit."""
+    items = 0
+    for round_ in range(env.args.repeat):
+        pages = PageCache(DiskCache(os.path.join(env.workdir, f"pages-{round_}.sqlite")), fresh_for=0)
+        for url in env.urls.values():
+            with rec.time("load_page[cold]"):
+                pages.load(url)
+            with rec.time("load_page[revalidated]"):
+                pages.load(url)
+            pages.fresh_for = 300
+            with rec.time("load_page[fresh]"):
+                pages.load(url)
+            pages.fresh_for = 0
+            items += 3
+    return items
+
+def bench_extract_jobs(env, rec):
+    chain = env.chain()
+    env.jobs = []
+    for name, html in env.corpus.items():
+        text = env.texts.get(name) or extract_page_text(html)["text"]
+        with rec.time(f"extract_jobs[{name}]"):
+            jobs = chain.extract_jobs(text)
+        env.jobs.extend(jobs)
+    return len(env.corpus)
+
+def _portfolio(env):
+    # Chroma persists to ./vectorstore, which is the run's temporary working directory
+    return Portfolio(file_path=env.portfolio_csv, embedding_function=HashEmbeddingFunction())
+
+def bench_portfolio(env, rec):
+    with rec.time("portfolio_init"):
+        portfolio = _portfolio(env)
+    with rec.time("load_portfolio_cold"):
+        portfolio.load_portfolio()
+    with rec.time("load_portfolio_unchanged"):
+        portfolio.load_portfolio()
+    jobs = env.jobs or [{"skills": ["Python", "SQL", "Spark"]}]
+    for job in jobs:
+        with rec.time("query_links"):
+            portfolio.query_links(job.get("skills", []))
+    return len(jobs)
+
+def bench_organization(env, rec):
+    """Every job on the largest page through portfolio lookup, email writing and Hunter.io."""
+    chain = env.chain()
+    portfolio = _portfolio(env)
+    portfolio.load_portfolio()
+    name = max(env.corpus, key=lambda n: PAGE_SIZES[n])
+    jobs = chain.extract_jobs(env.texts.get(name) or extract_page_text(env.corpus[name])["text"])
+    started = time.perf_counter()
+    for _ in organization_outreach(chain, portfolio, env.hunter(), jobs, max_workers=env.args.concurrency):
+        rec.add("job_ready", time.perf_counter() - started)
+    return len(jobs)
+
+def bench_hunter(env, rec):
+    hunter = env.hunter()
+    pairs = [(job.get("recruiter_name", ""), job.get("company_name", "")) for job in env.jobs]
+    pairs = pairs or [("Alex Kim", f"Company{i}") for i in range(20)]
+
+    def lookup(pair):
+        with rec.time("find_email_cold"):
+            hunter.find_email(*pair)
+
+    with ThreadPoolExecutor(max_workers=env.args.concurrency) as pool:
+        list(pool.map(lookup, pairs))
+    for pair in pairs:
+        with rec.time("find_email_cached"):
+            hunter.find_email(*pair)
+    return len(pairs) * 2
+
+def bench_individual(env, rec):
+    """The full individual pipeline (fetch → extract → Hunter → cover letter → cold email) per URL."""
+    chain = env.individual_chain()
+    parser = ResumeParser(cache=DiskCache(os.path.join(env.workdir, "resumes.sqlite"), enabled=False))
+    resume = RESUME_TEXT.encode("utf-8")
+    urls = list(env.urls.values()) * env.args.repeat
+
+    def run(url):
+        with rec.time("pipeline_total"):
+            pipeline_run = individual_pipeline(chain, url, lambda: parser.parse(resume, "text/plain")).start()
+            pipeline_run.wait()
+        for stage, seconds in pipeline_run.timings.items():
+            rec.add(f"stage:{stage}", seconds)
+
+    with ThreadPoolExecutor(max_workers=env.args.concurrency) as pool:
+        list(pool.map(run, urls))
+    return len(urls)
+
+def bench_send(env, rec):
+    """Enqueue messages with a cover-letter attachment and wait for the worker to send them."""
+    outbox = Outbox(path=os.path.join(env.workdir, f"outbox-{time.monotonic_ns()}.sqlite"))
+    gmail = GmailService(api_endpoint=env.gmail_server.url)
+    worker = OutboxWorker(outbox, gmail, sends_per_second=env.args.sends_per_second, poll_interval=0.05)
+    worker.start()
+    letter = "Jamie Rivera\n\n" + "I am excited to apply. " * 60
+    ids = []
+    try:
+        for i in range(env.args.messages):
+            with rec.time("enqueue"):
+                key = outbox.attachments.add_cover_letter(letter)
+                ids.append((outbox.enqueue(f"recruiter{i}@example.com", "me@example.com", "Hello", f"Body {i}", [key]),
+                            time.perf_counter()))
+            worker.wake()
+        for message_id, queued in ids:
+            record = outbox.wait_for(message_id, timeout=60, interval=0.01)
+            if record["status"] != "sent":
+                raise RuntimeError(f"Message {message_id} ended as {record['status']}: {record['last_error']}")
+            rec.add("enqueue_to_sent", time.perf_counter() - queued)
+    finally:
+        worker.stop()
+    return len(ids)
+
+def bench_ledger(env, rec):
+    """Duplicate lookups against a ledger of `--ledger-rows` postings: reposts, new postings and recording."""
+    rng = random.Random(env.args.seed)
+    ledger = Ledger(os.path.join(env.workdir, f"ledger-{time.monotonic_ns()}.sqlite"))
+    postings = [make_posting(rng, i) for i in range(env.args.ledger_rows)]
+    # Filling the ledger is setup, and tracemalloc slows the pure-Python MinHash about tenfold
+    tracemalloc.stop()
+    try:
+        for job in postings:
+            with rec.time("record"):
+                ledger.record(job, url="https://example.com/jobs")
+    finally:
+        tracemalloc.start()
+    samples = rng.sample(postings, min(200, len(postings)))
+    for job in samples:
+        with rec.time("find_repost"):
+            if ledger.find(repost(rng, job)) is None:
+                raise RuntimeError("A repost was not recognised as a duplicate")
+        with rec.time("find_new"):
+            ledger.find(make_posting(rng, rng.randrange(10 ** 6)))
+    return len(postings) + 2 * len(samples)
+
+SCENARIOS = {
+    "extract_text": bench_extract_text,
+    "load_page": bench_load_page,
+    "extract_jobs": bench_extract_jobs,
+    "portfolio": bench_portfolio,
+    "hunter": bench_hunter,
+    "organization": bench_organization,
+    "individual": bench_individual,
+    "send": bench_send,
+    "ledger": bench_ledger,
+}
+
+def run_scenario(name, env):
+    rec = Recorder()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        items = SCENARIOS[name](env, rec)
+        error = None
+    except Exception as e:
+        items, error = 0, f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_s": round(wall, 4),
+        "items": items,
+        "throughput_per_s": round(items / wall, 3) if wall else 0.0,
+        "peak_memory_mb": round(peak / 2 ** 20, 3),
+        "stages": rec.summary(),
+        "error": error,
+    }
+
+# ----------------- REPORTING -----------------
+def print_report(results):
+    for name, result in results["scenarios"].items():
+        status = f"ERROR {result['error']}" if result["error"] else (
+            f"{result['items']} items in {result['wall_s']:.2f}s, {result['throughput_per_s']:.2f}/s, "
+            f"peak {result['peak_memory_mb']:.1f} MB"
+        )
+        print(f"\n== {name}: {status}")
+        for stage, stats in result["stages"].items():
+            print(f"   {stage:<32} n={stats['count']:<5} p50={stats['p50_ms']:>10.2f} ms  p95={stats['p95_ms']:>10.2f} ms")
+
+def compare(baseline, current, threshold):
+    """Print changes against a saved run; returns the regressions beyond `threshold` (a fraction)."""
+    regressions = []
+
+    def check(label, old, new, higher_is_worse=True):
+        if not old:
+            return
+        change = (new - old) / old
+        worse = change > threshold if higher_is_worse else change < -threshold
+        print(f"   {label:<48} {old:>10.2f} → {new:>10.2f}  ({change:+.1%}){'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(label)
+
+    print(f"\n== Compared with {baseline.get('timestamp', 'baseline')}")
+    for name, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old or old.get("error") or result.get("error"):
+            continue
+        check(f"{name} throughput/s", old["throughput_per_s"], result["throughput_per_s"], higher_is_worse=False)
+        check(f"{name} peak MB", old["peak_memory_mb"], result["peak_memory_mb"])
+        for stage, stats in result["stages"].items():
+            if stage in old["stages"]:
+                check(f"{name} {stage} p95 ms", old["stages"][stage]["p95_ms"], stats["p95_ms"])
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks with local fakes for Groq, Hunter.io, Gmail and job pages.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--quick", action="store_true", help="Smaller, faster run (fast fakes, fewer repeats)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the page corpus")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=300.0, help="Fake LLM time to first token (ms)")
+    parser.add_argument("--tokens-per-second", type=float, default=250.0, help="Fake LLM output rate")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Length of generated prose")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--small-model-error-rate", type=float, default=0.1,
+                        help="Share of small-model extractions with the wrong schema (forces escalation)")
+    parser.add_argument("--http-latency", type=float, default=20.0, help="Fake careers-site latency (ms)")
+    parser.add_argument("--hunter-latency", type=float, default=50.0, help="Fake Hunter.io latency (ms)")
+    parser.add_argument("--gmail-latency", type=float, default=50.0, help="Fake Gmail latency (ms)")
+    parser.add_argument("--sends-per-second", type=float, default=20.0)
+    parser.add_argument("--messages", type=int, default=50, help="Messages sent in the send scenario")
+    parser.add_argument("--portfolio-rows", type=int, default=500)
+    parser.add_argument("--ledger-rows", type=int, default=20000, help="Postings stored before the ledger lookups")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Where to save results (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeat, args.messages, args.portfolio_rows, args.ledger_rows = 1, 10, 100, 2000
+        args.llm_latency, args.tokens_per_second = min(args.llm_latency, 20.0), max(args.tokens_per_second, 5000.0)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="coldmail-bench-") as workdir:
+        os.chdir(workdir)
+        env = BenchEnv(args, workdir)
+        try:
+            for name in names:
+                print(f"Running {name}...", flush=True)
+                results["scenarios"][name] = run_scenario(name, env)
+        finally:
+            env.close()
+            os.chdir(cwd)
+
+    print_report(results)
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {out}")
+
+    failed = [name for name, result in results["scenarios"].items() if result["error"]]
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+    return 1 if failed or regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
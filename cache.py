@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with per-entry TTL, LRU eviction and hit/miss counters.
+
+    Values must be JSON-serializable. A disabled cache never returns hits and never stores.
+    With `max_bytes` set, the least recently used entries are also evicted once the stored
+    values add up to more than that.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl=None, enabled=True, max_bytes=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   expires REAL,
+                   accessed REAL NOT NULL,
+                   size INTEGER NOT NULL DEFAULT 0
+               )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "size" not in columns:
+            # Caches written before sizes were tracked
+            self._conn.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE entries SET size = LENGTH(CAST(value AS BLOB))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+        # Running total of stored value bytes, kept up to date by every write and delete
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                if row is not None:
+                    self._delete("key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl else None
+        payload = json.dumps(value)
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, expires, now, size),
+            )
+            self._conn.commit()
+            self._bytes += size - (old[0] if old else 0)
+            self._writes += 1
+            # Counting rows is a table scan, so only check the entry bound every so often;
+            # the byte bound is checked against the running total on every write
+            if (self.max_bytes and self._bytes > self.max_bytes) or (self.max_entries and self._writes % 100 == 1):
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._delete("key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._bytes = 0
+
+    def _delete(self, where, params=()):
+        """Delete the matching rows and take their sizes off the running total. Returns the row count."""
+        count, size = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE {where}", params
+        ).fetchone()
+        if count:
+            self._conn.execute(f"DELETE FROM entries WHERE {where}", params)
+            self._bytes -= size
+        return count
+
+    def _evict(self):
+        self._delete("expires IS NOT NULL AND expires < ?", (time.time(),))
+        if self.max_entries:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self.evictions += self._delete(
+                    "key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)", (excess,)
+                )
+        if self.max_bytes and self._bytes > self.max_bytes:
+            total, doomed = self._bytes, []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+            self._bytes = total
+            self.evictions += len(doomed)
+        self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            stored = self._bytes
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": size,
+            "bytes": stored,
+        }
+
+
+def hash_key(*parts):
+    """Stable sha256 key for any JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----------------- LLM RESPONSE CACHE -----------------
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def llm_cache_key(model_name, temperature, prompt):
+    return hash_key("llm", model_name, temperature, prompt)
+
+
+def get_llm_cache():
+    """Process-wide LLM cache. Set LLM_CACHE=off to bypass it."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = DiskCache(
+                os.path.join(CACHE_DIR, "llm.sqlite"),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+                ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                enabled=os.getenv("LLM_CACHE", "on").lower() not in ("off", "0", "false"),
+            )
+    return _llm_cache
@@ -2,21 +2,151 @@
 import os
 import re
 import json
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
+from cache import get_llm_cache, llm_cache_key
+from clients import get_groq
+from hunter import HunterClient
+from resume import extract_contact_info, format_profile
+from routing import ModelCascade, validate_job, validate_jobs
+from tracing import span, start_span, wrap
+from utils import estimate_tokens, split_into_windows, normalize_text, find_emails
 
 load_dotenv()
 
+# ----------------- CACHED LLM CALLS -----------------
+def cacheable(llm):
+    """Only temperature-0 calls are cached: a sampled response is one draw, and repeating it would
+    make every retry of the same prompt return the same letter."""
+    return not llm.temperature
+
+def invoke_llm(llm, prompt, cache=None, limiter=None):
+    """Invoke `llm` with a rendered prompt and return the response text, serving deterministic repeats from the cache.
+
+    A `limiter` (ratelimit.RateLimiter) is acquired before each request that actually reaches the model.
+    """
+    cache = cache if cache is not None else get_llm_cache()
+    key = llm_cache_key(llm.model_name, llm.temperature, prompt)
+    with span("llm", model=llm.model_name, temperature=llm.temperature) as current:
+        content = cache.get(key) if cacheable(llm) else None
+        current.set(cache_hit=content is not None)
+        if content is None:
+            if limiter is not None:
+                limiter.acquire()
+            response = llm.invoke(prompt)
+            content = response.content
+            current.set(**token_usage(prompt, content, getattr(response, "usage_metadata", None)))
+            if cacheable(llm):
+                cache.set(key, content)
+    return content
+
+def stream_llm(llm, prompt, cache=None, limiter=None):
+    """Yield response text from `llm` as it arrives; a cached (temperature-0) response is yielded in one piece.
+
+    `limiter` paces requests, as in invoke_llm.
+    """
+    cache = cache if cache is not None else get_llm_cache()
+    key = llm_cache_key(llm.model_name, llm.temperature, prompt)
+    content = cache.get(key) if cacheable(llm) else None
+    # Not made current: the caller runs between chunks, and its own spans shouldn't nest under this one
+    current = start_span("llm", model=llm.model_name, temperature=llm.temperature, stream=True, cache_hit=content is not None)
+    if content is not None:
+        current.end()
+        yield content
+        return
+    parts, usage = [], None
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        for chunk in llm.stream(prompt):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.content:
+                if not parts:
+                    current.set(first_token_ms=round(current.elapsed() * 1000, 1))
+                parts.append(chunk.content)
+                yield chunk.content
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    content = "".join(parts)
+    current.set(**token_usage(prompt, content, usage))
+    current.end()
+    # Only a stream that ran to completion is worth caching
+    if cacheable(llm):
+        cache.set(key, content)
+
+def token_usage(prompt, completion, usage=None):
+    """Prompt/completion token counts from the provider's usage metadata, else estimated from the text."""
+    usage = usage or {}
+    return {
+        "prompt_tokens": usage.get("input_tokens") or estimate_tokens(prompt),
+        "completion_tokens": usage.get("output_tokens") or estimate_tokens(completion),
+        "estimated": not usage,
+    }
+
+def merge_jobs(jobs):
+    """Deduplicate postings extracted from overlapping windows by role, company and description."""
+    merged = []
+    for job in jobs:
+        if not isinstance(job, dict):
+            continue
+        role = normalize_text(job.get("role"))
+        company = normalize_text(job.get("company_name") or job.get("company name"))
+        description = normalize_text(job.get("description"))
+        for kept in merged:
+            if kept["_role"] != role or kept["_company"] != company:
+                continue
+            # A posting cut at a window edge shows up again with a partial description. An empty
+            # description is contained in every other one, so only identical postings merge then.
+            if description and kept["_description"]:
+                same = description in kept["_description"] or kept["_description"] in description
+            else:
+                same = description == kept["_description"]
+            if same:
+                if len(description) > len(kept["_description"]):
+                    kept["job"].update({k: v for k, v in job.items() if v})
+                    kept["_description"] = description
+                break
+        else:
+            merged.append({"job": dict(job), "_role": role, "_company": company, "_description": description})
+    return [entry["job"] for entry in merged]
+
 # ----------------- ORGANIZATION PATH (CONSULTING MANAGER) -----------------
 class Chain:
-    def __init__(self):
-        self.llm = ChatGroq(temperature=0, groq_api_key=os.getenv("GROQ_API_KEY"), model_name="llama3-70b-8192")
-
-    def extract_jobs(self, cleaned_text):
+    def __init__(self, cache=None):
+        self.llm = get_groq("llama3-70b-8192", temperature=0)
+        self.cache = cache if cache is not None else get_llm_cache()
+        # Set to a RateLimiter to pace every model request, cascade escalations included
+        self.limiter = None
+        # Extraction tries the small model first and escalates on malformed output
+        self.cascade = ModelCascade(lambda llm, prompt: invoke_llm(llm, prompt, self.cache, limiter=self.limiter))
+
+    def extract_jobs(self, cleaned_text, window_tokens=3000, overlap_tokens=300, max_workers=4):
+        """Extract job postings, splitting pages larger than `window_tokens` into overlapping windows."""
+        windows = split_into_windows(cleaned_text, window_tokens, overlap_tokens)
+        if len(windows) <= 1:
+            return self._extract_window(cleaned_text)
+
+        def extract(window, first=0):
+            try:
+                return self._extract_window(window, escalate_on_empty=False, first=first)
+            except OutputParserException:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Many windows of a long page hold no posting, so emptiness is judged for the whole page:
+            # only when no window found a job are they all asked again, of the next model
+            results = list(pool.map(wrap(extract), windows))
+            if not any(results) and self.cascade.enabled and self.cascade.policies["jobs"].escalate_on_empty:
+                results = list(pool.map(wrap(extract), windows, [1] * len(windows)))
+        if all(res is None for res in results):
+            raise OutputParserException("Unable to parse jobs from any part of the page.")
+        return merge_jobs([job for res in results if res for job in res])
+
+    def _extract_window(self, cleaned_text, **route_options):
         prompt_extract = PromptTemplate.from_template(
             """
             ### SCRAPED TEXT FROM WEBSITE:
@@ -24,21 +154,29 @@ class Chain:
             ### INSTRUCTION:
             The scraped text is from the career's page of a website.
             Your job is to extract the job postings and return them in JSON format containing the
-            following keys: role, experience, skills, description, company name, recruiter_name.
+            following snake_case keys: role, experience, skills, description, company_name, recruiter_name.
             Only return the valid JSON.
             ### VALID JSON (NO PREAMBLE):
             """
         )
-        chain_extract = prompt_extract | self.llm
-        res = chain_extract.invoke(input={"page_data": cleaned_text})
-        try:
-            json_parser = JsonOutputParser()
-            res = json_parser.parse(res.content)
-        except OutputParserException:
-            raise OutputParserException("Context too big. Unable to parse jobs.")
-        return res if isinstance(res, list) else [res]
+
+        def parse(res):
+            try:
+                json_parser = JsonOutputParser()
+                res = json_parser.parse(res)
+            except OutputParserException:
+                raise OutputParserException("Context too big. Unable to parse jobs.")
+            return res if isinstance(res, list) else [res]
+
+        return self.cascade.run("jobs", prompt_extract.format(page_data=cleaned_text), parse, validate_jobs, **route_options)
 
     def write_mail(self, job, links):
+        return invoke_llm(self.llm, self._mail_prompt(job, links), self.cache, limiter=self.limiter).strip()
+
+    def stream_mail(self, job, links):
+        yield from stream_llm(self.llm, self._mail_prompt(job, links), self.cache, limiter=self.limiter)
+
+    def _mail_prompt(self, job, links):
         prompt_email = PromptTemplate.from_template(
             """
             ### JOB DESCRIPTION:
@@ -61,23 +199,21 @@ class Chain:
             Output ONLY the email body (no explanations).
             """
         )
-        chain_email = prompt_email | self.llm
-        res = chain_email.invoke({"job_description": str(job), "link_list": links})
-        return res.content.strip()
+        if isinstance(links, (list, tuple)):
+            links = "\n".join(f"- {link}" for link in links)
+        return prompt_email.format(job_description=str(job), link_list=links)
 
 # ----------------- INDIVIDUAL PATH (STUDENT PATH) -----------------
 class IndividualChain:
-    def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0,
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama3-70b-8192"
-        )
-        self.client = ChatGroq(
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama3-8b-8192"
-        )
+    def __init__(self, cache=None):
+        self.client = get_groq("llama3-8b-8192")
         self.hunter_api_key = os.getenv("HUNTER_API_KEY")
+        self.hunter = HunterClient(self.hunter_api_key)
+        self.cache = cache if cache is not None else get_llm_cache()
+        # Set to a RateLimiter to pace every model request, cascade escalations included
+        self.limiter = None
+        # Extraction tries the small model first and escalates on malformed output
+        self.cascade = ModelCascade(lambda llm, prompt: invoke_llm(llm, prompt, self.cache, limiter=self.limiter))
 
     def extract_job_info(self, cleaned_text):
         prompt = f"""
@@ -95,52 +231,55 @@ class IndividualChain:
 
         Return ONLY valid JSON. No preambles, no markdown.
         """
-        result = self.llm.invoke(prompt.strip())
-        content = result.content.strip()
 
-        json_match = re.search(r"\{.*\}", content, re.DOTALL)
-        if not json_match:
-            raise ValueError(f"Failed to find JSON in LLM response.\nContent was: {content}")
+        def parse(content):
+            content = content.strip()
+            json_match = re.search(r"\{.*\}", content, re.DOTALL)
+            if not json_match:
+                raise ValueError(f"Failed to find JSON in LLM response.\nContent was: {content}")
 
-        json_text = json_match.group(0)
+            json_text = json_match.group(0)
 
-        try:
-            job = json.loads(json_text)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse extracted JSON: {e}\nContent was: {json_text}")
+            try:
+                job = json.loads(json_text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Failed to parse extracted JSON: {e}\nContent was: {json_text}")
 
-        return job
+            return job
 
-    def extract_contact_info(self, text):
-        email_match = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", text)
-        phone_match = re.search(r"(\+?\d{1,3})?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}", text)
-        linkedin_match = re.search(r"(https?://)?(www\.)?(linkedin\.com/in/[a-zA-Z0-9-_/]+)", text)
+        return self.cascade.run("job_info", prompt.strip(), parse, validate_job)
 
-        return {
-            "email": email_match.group(0) if email_match else "youremail@example.com",
-            "phone": phone_match.group(0) if phone_match else "(123) 456-7890",
-            "linkedin": linkedin_match.group(0) if linkedin_match else "https://linkedin.com/in/yourname",
-            "name": "Your Name"
-        }
+    def extract_contact_info(self, text):
+        return extract_contact_info(text)
 
     def lookup_recruiter_email(self, recruiter_name, company_name):
-        try:
-            domain_resp = requests.get(
-                f"https://api.hunter.io/v2/domain-search?company={company_name}&api_key={self.hunter_api_key}"
-            ).json()
-            domain = domain_resp.get("data", {}).get("domain", "")
-            if not domain:
-                return ""
-            email_resp = requests.get(
-                "https://api.hunter.io/v2/email-finder",
-                params={"full_name": recruiter_name, "domain": domain, "api_key": self.hunter_api_key}
-            ).json()
-            return email_resp.get("data", {}).get("email", "")
-        except Exception as e:
-            print(f"Error in recruiter email lookup: {e}")
-            return ""
-
-    def generate_cover_letter(self, job, resume_text):
+        return self.hunter.find_email(recruiter_name, company_name)
+
+    def lookup_recruiter_emails(self, pairs):
+        """Bulk Hunter.io lookup for (recruiter_name, company_name) pairs; returns {pair: email}."""
+        return self.hunter.find_emails(pairs)
+
+    def resolve_recruiter_email(self, job, page_text=""):
+        """Recruiter email from the extracted job, else from the page itself, else via Hunter.io."""
+        if job.get("recruiter_email"):
+            return job["recruiter_email"]
+        page_emails = find_emails(page_text)
+        if page_emails:
+            return page_emails[0]
+        if job.get("company_name"):
+            return self.lookup_recruiter_email(job.get("recruiter_name", ""), job.get("company_name", ""))
+        return ""
+
+    def generate_cover_letter(self, job, applicant_profile):
+        return invoke_llm(self.client, self._cover_letter_prompt(job, applicant_profile), self.cache, limiter=self.limiter).strip()
+
+    def stream_cover_letter(self, job, applicant_profile):
+        yield from stream_llm(self.client, self._cover_letter_prompt(job, applicant_profile), self.cache, limiter=self.limiter)
+
+    def _cover_letter_prompt(self, job, applicant_profile):
+        """`applicant_profile` is a profile from resume.build_profile, or raw resume text."""
+        if isinstance(applicant_profile, dict):
+            applicant_profile = format_profile(applicant_profile)
         prompt = f"""
         You are helping write a professional cover letter.
 
@@ -149,9 +288,9 @@ class IndividualChain:
         - Company: {job.get('company_name')}
         - Description: {job.get('description')}
 
-        Resume:
+        Applicant:
         -------------------------------
-        {resume_text}
+        {applicant_profile}
         -------------------------------
 
         ### INSTRUCTIONS (STRICT):
@@ -165,10 +304,18 @@ class IndividualChain:
         Output ONLY the cover letter body. No text heading, No Preambles.
         ### COVER LETTER BODY (NO PREAMBLE, NO HEADING):
         """
-        result = self.client.invoke(prompt.strip())
-        return result.content.strip()
+        return prompt.strip()
 
     def generate_cold_email(self, job, applicant_info, cover_letter_text):
+        prompt = self._cold_email_prompt(job, applicant_info, cover_letter_text)
+        return self.finalize_cold_email(invoke_llm(self.client, prompt, self.cache, limiter=self.limiter), applicant_info)
+
+    def stream_cold_email(self, job, applicant_info, cover_letter_text):
+        """Yield the raw email as it streams; pass the joined text to finalize_cold_email afterwards."""
+        prompt = self._cold_email_prompt(job, applicant_info, cover_letter_text)
+        yield from stream_llm(self.client, prompt, self.cache, limiter=self.limiter)
+
+    def _cold_email_prompt(self, job, applicant_info, cover_letter_text):
         # Improved logic to extract the first non-empty line as name
         lines = cover_letter_text.strip().split('\n')
         lines = [line.strip() for line in lines if line.strip()]  # Remove empty lines
@@ -203,10 +350,11 @@ Only output the email, no explanations, no markdown formatting.
 Do not provide a preamble.
 ### EMAIL (NO PREAMBLE):
         """
+        return prompt.strip()
 
-        result = self.client.invoke(prompt.strip())
+    def finalize_cold_email(self, raw_email, applicant_info):
         # After LLM generates the raw email
-        final_email = result.content.strip()
+        final_email = raw_email.strip()
 
         # Clean any hallucinated cover letters
         keywords = ["here is the cover letter", "attached is the cover letter", "generated cover letter"]
@@ -0,0 +1,100 @@
+# ================== checkpoints.py (Stage Checkpoints) ==================
+import os
+import inspect
+import hashlib
+import threading
+from cache import CACHE_DIR, DiskCache, hash_key
+from tracing import current_span
+
+# Bump to invalidate every stored stage output at once
+CHECKPOINT_FORMAT = 1
+
+_source_hashes = {}
+_source_lock = threading.Lock()
+
+def _source_hash(fn):
+    fn = getattr(fn, "__func__", fn)
+    with _source_lock:
+        if fn not in _source_hashes:
+            try:
+                source = inspect.getsource(fn)
+            except (OSError, TypeError):
+                source = f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+            _source_hashes[fn] = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        return _source_hashes[fn]
+
+def code_version(*parts):
+    """Version string for a stage: functions contribute a hash of their source, anything else (model names) its str.
+
+    Pass the methods that build the stage's prompt, so editing a prompt invalidates its outputs.
+    """
+    return hash_key(CHECKPOINT_FORMAT, [_source_hash(p) if callable(p) else str(p) for p in parts])[:16]
+
+# ----------------- STORE -----------------
+class CheckpointStore:
+    """Stage outputs keyed by a hash of the stage name, its code/prompt version and its inputs.
+
+    The same inputs through the same code give the same output, so a rerun only recomputes
+    stages whose inputs or code changed, and an interrupted run picks up after its last
+    finished stage. Empty outputs (no email found, no jobs) are not stored, so they are retried.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else DiskCache(
+            os.path.join(CACHE_DIR, "checkpoints.sqlite"),
+            max_entries=int(os.getenv("CHECKPOINT_MAX_ENTRIES", "20000")),
+            ttl=float(os.getenv("CHECKPOINT_TTL", str(30 * 24 * 3600))),
+            enabled=os.getenv("CHECKPOINTS", "on").lower() not in ("off", "0", "false"),
+        )
+        self.restored = 0
+        self.computed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(stage, version, inputs):
+        return hash_key("checkpoint", stage, version, list(inputs))
+
+    def load(self, key):
+        """(True, output) if `key` has a stored output, else (False, None)."""
+        entry = self.cache.get(key)
+        return (True, entry["output"]) if entry is not None else (False, None)
+
+    def save(self, key, output):
+        if output:
+            self.cache.set(key, {"output": output})
+
+    def cached(self, stage, version, inputs, compute):
+        """The stored output of `stage` for these inputs, or `compute()` stored for next time."""
+        key = self.key(stage, version, inputs)
+        found, output = self.load(key)
+        if not found:
+            output = compute()
+            self.save(key, output)
+        self.count(found)
+        return output
+
+    def count(self, restored):
+        """Tally a restored or computed stage, on the store and on the current span."""
+        with self._lock:
+            if restored:
+                self.restored += 1
+            else:
+                self.computed += 1
+        span = current_span()
+        if span is not None:
+            span.set(checkpoint="restored" if restored else "computed")
+
+    def stats(self):
+        with self._lock:
+            return {"restored": self.restored, "computed": self.computed, "entries": self.cache.stats()["entries"]}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_checkpoints():
+    """Process-wide checkpoint store. Set CHECKPOINTS=off to always recompute."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore()
+    return _store
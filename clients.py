@@ -0,0 +1,54 @@
+import os
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared, pooled network clients. Everything here is created once per process and
+# reused by every chain, page fetch and Streamlit session.
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "50"))
+
+_lock = threading.Lock()
+_http_client = None
+_session = None
+_groq_clients = {}
+
+def get_http_client():
+    """httpx client with keep-alive connection pooling, used by the Groq SDK."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+    return _http_client
+
+def get_session():
+    """requests session with a connection pool sized for concurrent page fetches and API calls."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+def get_groq(model_name, temperature=None):
+    """One ChatGroq client per (model, temperature), all sharing the pooled httpx client."""
+    # Imported here: langchain_groq is the slowest import in the app and most pages never call a model
+    from langchain_groq import ChatGroq
+
+    key = (model_name, temperature)
+    http_client = get_http_client()
+    with _lock:
+        if key not in _groq_clients:
+            kwargs = {"temperature": temperature} if temperature is not None else {}
+            _groq_clients[key] = ChatGroq(
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                model_name=model_name,
+                http_client=http_client,
+                **kwargs,
+            )
+    return _groq_clients[key]
@@ -0,0 +1,334 @@
+# ================== crawler.py (Careers-Site Crawler) ==================
+"""Crawl careers pages for job postings and stream them into job extraction.
+
+    python crawler.py https://example.com/careers --out jobs.jsonl --max-pages 200 --per-host 2
+
+Starting from seed careers URLs, the crawler follows links that look like individual
+postings (and "next page" links), fetching through one pooled async HTTP client with a
+concurrency limit and crawl delay per host. robots.txt is honoured, including Crawl-delay.
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import httpx
+from bs4 import BeautifulSoup
+from tracing import span
+from utils import extract_page_text
+
+USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "ColdEmailAssistant/1.0 (careers crawler)")
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+# Links to a single posting: /jobs/123, /careers/data-engineer, ?gh_jid=..., ATS boards
+POSTING_LINK = re.compile(
+    r"/(jobs?|careers?|positions?|openings?|vacanc(y|ies)|opportunit(y|ies)|requisitions?|postings?)/[^/?#]+"
+    r"|[?&](gh_jid|jobid|job_id|jid|req(uisition)?_?id)="
+    r"|(boards\.greenhouse\.io|jobs\.lever\.co|jobs\.ashbyhq\.com|myworkdayjobs\.com|smartrecruiters\.com)/",
+    re.I,
+)
+NEXT_PAGE_TEXT = re.compile(r"^\s*(next|more jobs|load more|›|»|>)\s*$", re.I)
+# Query parameters that never change the page's content
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|mc_[ce]id|ref|source|src|trk|_hs\w+)$", re.I)
+
+# ----------------- URLS -----------------
+def normalize_url(url, base=None):
+    """Canonical form used for deduplication: absolute, lower-case host, no fragment,
+    default port, tracking parameters or trailing slash, and sorted query parameters."""
+    url = urljoin(base, url.strip()) if base else url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return None
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    port = parts.port
+    netloc = host if port in (None, 80 if scheme == "http" else 443) else f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+def discover_links(html, page_url):
+    """Posting links and next-page links on a careers page, normalized and deduplicated."""
+    soup = BeautifulSoup(html, "html.parser")
+    postings, pages = {}, {}
+    for anchor in soup.find_all("a", href=True):
+        url = normalize_url(anchor["href"], base=page_url)
+        if not url or url == normalize_url(page_url):
+            continue
+        rel = " ".join(anchor.get("rel") or []).lower()
+        if "next" in rel or NEXT_PAGE_TEXT.match(anchor.get_text(" ", strip=True)):
+            pages.setdefault(url, None)
+        elif POSTING_LINK.search(url):
+            postings.setdefault(url, None)
+    return list(postings), list(pages)
+
+class CrawledPage:
+    def __init__(self, url, html, kind, depth, postings=(), status_code=200, error=None):
+        self.url = url
+        self.html = html
+        self.kind = kind  # "seed", "index" (a next page) or "posting"
+        self.depth = depth
+        self.postings = list(postings)
+        self.status_code = status_code
+        self.error = error
+
+# ----------------- CRAWLER -----------------
+class Crawler:
+    """Polite concurrent crawler; use as `async with Crawler() as crawler: async for page in crawler.crawl(seeds)`.
+
+    At most `per_host` requests run against one host at a time, and requests to a host start
+    at least `delay` seconds apart (or the robots.txt Crawl-delay, if longer). Only hosts of
+    the seed URLs and known applicant-tracking boards are crawled unless `same_host` is off.
+    """
+
+    def __init__(self, concurrency=16, per_host=2, delay=1.0, max_pages=200, max_depth=2,
+                 timeout=20, same_host=True, respect_robots=True, user_agent=USER_AGENT):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.same_host = same_host
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.client = None
+        self.seen = set()
+        self.stats = {"fetched": 0, "errors": 0, "robots_blocked": 0, "duplicates": 0}
+        self._hosts = {}
+        self._robots = {}
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"},
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            follow_redirects=True,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = {"semaphore": asyncio.Semaphore(self.per_host), "lock": asyncio.Lock(), "next": 0.0}
+        return self._hosts[host]
+
+    async def _robots_for(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            # Claimed before the request so concurrent tasks share one fetch
+            future = self._robots[origin] = asyncio.get_running_loop().create_future()
+            robots = RobotFileParser()
+            try:
+                resp = await self.client.get(origin + "/robots.txt")
+                if resp.status_code in (401, 403):
+                    robots.disallow_all = True
+                elif resp.status_code < 400:
+                    robots.parse(resp.text.splitlines())
+                else:
+                    robots.allow_all = True
+            except Exception:
+                # Same rule as a missing robots.txt: nothing is disallowed
+                robots.allow_all = True
+            finally:
+                future.set_result(robots)
+        return await self._robots[origin]
+
+    async def allowed(self, url):
+        """Whether robots.txt lets us fetch `url`, plus the crawl delay to use for its host."""
+        if not self.respect_robots:
+            return True, self.delay
+        robots = await self._robots_for(url)
+        token = self.user_agent.split("/")[0]
+        return robots.can_fetch(token, url), max(self.delay, float(robots.crawl_delay(token) or 0))
+
+    async def fetch(self, url):
+        """GET `url` within the host's concurrency limit and crawl delay; returns (status, html)."""
+        allowed, delay = await self.allowed(url)
+        if not allowed:
+            self.stats["robots_blocked"] += 1
+            return None, None
+        host = self._host(url)
+        async with host["semaphore"]:
+            async with host["lock"]:
+                wait = host["next"] - time.monotonic()
+                host["next"] = max(host["next"], time.monotonic()) + delay
+            if wait > 0:
+                await asyncio.sleep(wait)
+            with span("fetch", url=url, crawler=True) as current:
+                resp = await self.client.get(url)
+                current.set(status_code=resp.status_code, bytes=len(resp.content))
+        self.stats["fetched"] += 1
+        content_type = resp.headers.get("content-type", "")
+        if resp.status_code >= 400 or "html" not in content_type or len(resp.content) > MAX_PAGE_BYTES:
+            return resp.status_code, None
+        return resp.status_code, resp.text
+
+    def _in_scope(self, url, seed_hosts):
+        if not self.same_host:
+            return True
+        host = urlsplit(url).hostname or ""
+        return any(host == seed or host.endswith("." + seed) for seed in seed_hosts) or bool(
+            re.search(r"greenhouse\.io|lever\.co|ashbyhq\.com|myworkdayjobs\.com|smartrecruiters\.com", host)
+        )
+
+    async def crawl(self, seeds):
+        """Async generator of CrawledPage objects, yielded as soon as each page has been fetched."""
+        seeds = [url for url in (normalize_url(seed) for seed in seeds) if url]
+        seed_hosts = {urlsplit(url).hostname for url in seeds}
+        queue = asyncio.Queue()
+        results = asyncio.Queue()
+        for url in seeds:
+            if url not in self.seen:
+                self.seen.add(url)
+                queue.put_nowait((url, "seed", 0))
+        scheduled = len(self.seen)
+
+        async def worker():
+            nonlocal scheduled
+            while True:
+                url, kind, depth = await queue.get()
+                try:
+                    try:
+                        status, html = await self.fetch(url)
+                    except Exception as e:
+                        self.stats["errors"] += 1
+                        await results.put(CrawledPage(url, None, kind, depth, status_code=None, error=str(e)))
+                        continue
+                    if html is None:
+                        if status is not None:
+                            await results.put(CrawledPage(url, None, kind, depth, status_code=status, error=f"HTTP {status} or not HTML"))
+                        continue
+                    postings, next_pages = discover_links(html, url) if depth < self.max_depth else ([], [])
+                    for link, link_kind in [(u, "posting") for u in postings] + [(u, "index") for u in next_pages]:
+                        if link in self.seen:
+                            self.stats["duplicates"] += 1
+                        elif scheduled < self.max_pages and self._in_scope(link, seed_hosts):
+                            self.seen.add(link)
+                            scheduled += 1
+                            queue.put_nowait((link, link_kind, depth + 1))
+                    await results.put(CrawledPage(url, html, kind, depth, postings, status))
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        # Workers queue a page's result before marking it done, so once the queue drains every result is waiting
+        drained = asyncio.create_task(queue.join())
+        getter = None
+        try:
+            while True:
+                getter = asyncio.create_task(results.get())
+                done, _ = await asyncio.wait({getter, drained}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                    continue
+                while not results.empty():
+                    yield results.get_nowait()
+                break
+        finally:
+            tasks = workers + [drained] + ([getter] if getter else [])
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+# ----------------- EXTRACTION -----------------
+def should_extract(page):
+    # An index page that links out to postings is just a list of links; the postings carry the details
+    return page.html is not None and (page.kind == "posting" or not page.postings)
+
+async def extract_stream(chain, pages, concurrency=4):
+    """Feed crawled pages through extract_page_text → chain.extract_jobs; yields (page, jobs, error) as each finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def extract(page):
+        async with semaphore:
+            try:
+                text = (await asyncio.to_thread(extract_page_text, page.html))["text"]
+                jobs = await asyncio.to_thread(chain.extract_jobs, text)
+            except Exception as e:
+                return page, [], f"{type(e).__name__}: {e}"
+        for job in jobs:
+            job.setdefault("source_url", page.url)
+        return page, jobs, None
+
+    pending = set()
+    async for page in pages:
+        if should_extract(page):
+            pending.add(asyncio.create_task(extract(page)))
+        finished = {task for task in pending if task.done()}
+        pending -= finished
+        for task in finished:
+            yield task.result()
+    while pending:
+        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            yield task.result()
+
+def crawl_jobs(chain, seeds, **crawler_options):
+    """Synchronous helper: crawl `seeds` and return every extracted job, deduplicated."""
+    from chains import merge_jobs
+
+    async def run():
+        jobs = []
+        async with Crawler(**crawler_options) as crawler:
+            async for _, page_jobs, _ in extract_stream(chain, crawler.crawl(seeds)):
+                jobs.extend(page_jobs)
+        return merge_jobs(jobs)
+
+    return asyncio.run(run())
+
+# ----------------- CLI -----------------
+async def _main(args):
+    chain = None
+    if not args.no_extract:
+        from chains import Chain
+        chain = Chain()
+    found = 0
+    with open(args.out, "a", encoding="utf-8") if args.out else open(os.devnull, "w") as out:
+        async with Crawler(concurrency=args.concurrency, per_host=args.per_host, delay=args.delay,
+                           max_pages=args.max_pages, max_depth=args.max_depth,
+                           respect_robots=not args.ignore_robots) as crawler:
+            pages = crawler.crawl(args.seeds)
+            if chain is None:
+                async for page in pages:
+                    print(f"{page.kind:7} {page.status_code or '-':>3} {page.url}" + (f"  ({page.error})" if page.error else ""))
+                    out.write(json.dumps({"url": page.url, "kind": page.kind, "status": page.status_code,
+                                          "postings": page.postings, "error": page.error}) + "\n")
+            else:
+                async for page, jobs, error in extract_stream(chain, pages, concurrency=args.extract_concurrency):
+                    found += len(jobs)
+                    print(f"{len(jobs):3} job(s) {page.url}" + (f"  ({error})" if error else ""))
+                    for job in jobs:
+                        out.write(json.dumps(job, ensure_ascii=False) + "\n")
+                    out.flush()
+            print(f"Crawl finished: {crawler.stats}, {found} job(s) extracted", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl careers pages for job postings and extract them.")
+    parser.add_argument("seeds", nargs="+", help="Careers page URLs to start from")
+    parser.add_argument("--out", help="JSONL file extracted jobs (or, with --no-extract, pages) are appended to")
+    parser.add_argument("--max-pages", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight across all hosts")
+    parser.add_argument("--per-host", type=int, default=2, help="Requests in flight per host")
+    parser.add_argument("--delay", type=float, default=1.0, help="Minimum seconds between requests to one host")
+    parser.add_argument("--extract-concurrency", type=int, default=4, help="Pages extracted by the LLM at once")
+    parser.add_argument("--no-extract", action="store_true", help="Only crawl and list pages")
+    parser.add_argument("--ignore-robots", action="store_true", help="Skip robots.txt (only for sites you own)")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
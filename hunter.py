@@ -0,0 +1,113 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from cache import CACHE_DIR, DiskCache, hash_key
+from clients import get_session
+from ratelimit import RateLimiter
+from tracing import span, wrap
+from utils import normalize_text
+
+DAY = 24 * 3600
+
+class HunterClient:
+    """Hunter.io domain search + email finder with pooled connections, caching and rate limiting.
+
+    Company → domain and (name, domain) → email answers are cached on disk. Lookups that
+    come back empty are cached too, for a shorter time, so the same miss isn't paid for
+    twice. Network and server errors are never cached.
+    """
+
+    BASE_URL = "https://api.hunter.io/v2"
+
+    def __init__(self, api_key=None, base_url=None, cache=None, rate_per_minute=500, burst=15,
+                 timeout=10, ttl=30 * DAY, negative_ttl=DAY):
+        self.api_key = api_key or os.getenv("HUNTER_API_KEY")
+        self.base_url = (base_url or os.getenv("HUNTER_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.cache = cache if cache is not None else DiskCache(os.path.join(CACHE_DIR, "hunter.sqlite"), max_entries=500000)
+        # Hunter allows 15 requests/second and 500/minute on the search endpoints
+        self.limiter = RateLimiter.per_minute(rate_per_minute, burst=burst)
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.session = get_session()
+        self.requests_made = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint, params):
+        with span("hunter", endpoint=endpoint) as current:
+            self.limiter.acquire()
+            current.set(wait_ms=round(current.elapsed() * 1000, 1))
+            with self._lock:
+                self.requests_made += 1
+            resp = self.session.get(
+                f"{self.base_url}/{endpoint}",
+                params={**params, "api_key": self.api_key},
+                timeout=self.timeout,
+            )
+            current.set(status_code=resp.status_code)
+            # 404 is Hunter's "nothing found"; anything else non-2xx is an error worth retrying later
+            if resp.status_code == 404:
+                return {}
+            resp.raise_for_status()
+            return resp.json().get("data") or {}
+
+    def _cached(self, key, fetch):
+        """Serve `key` from the cache, or fetch it once even if several threads ask at the same time."""
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = fetch()
+            self.cache.set(key, value, ttl=self.ttl if value else self.negative_ttl)
+            future.set_result(value)
+        except Exception as e:
+            print(f"Error in Hunter.io lookup: {e}")
+            value = ""
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return value
+
+    def find_domain(self, company_name):
+        company = normalize_text(company_name)
+        if not company:
+            return ""
+        return self._cached(
+            hash_key("hunter-domain", company),
+            lambda: self._get("domain-search", {"company": company_name, "limit": 1}).get("domain") or "",
+        )
+
+    def find_email(self, full_name, company_name=None, domain=None):
+        domain = domain or self.find_domain(company_name)
+        name = " ".join((full_name or "").split())
+        if not domain or not name:
+            return ""
+        return self._cached(
+            hash_key("hunter-email", name.lower(), domain.lower()),
+            lambda: self._get("email-finder", {"full_name": name, "domain": domain}).get("email") or "",
+        )
+
+    def find_emails(self, pairs, max_workers=8):
+        """Resolve many (recruiter_name, company_name) pairs; returns {pair: email}.
+
+        Each distinct company is searched once, then each distinct (name, domain) once.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        companies = list(dict.fromkeys(company for _, company in pairs))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            domains = dict(zip(companies, pool.map(wrap(self.find_domain), companies)))
+            lookups = list(dict.fromkeys((name, domains[company]) for name, company in pairs))
+            emails = dict(zip(lookups, pool.map(wrap(lambda lookup: self.find_email(lookup[0], domain=lookup[1])), lookups)))
+        return {(name, company): emails[(name, domains[company])] for name, company in pairs}
+
+    def stats(self):
+        return {"requests": self.requests_made, **self.cache.stats()}
@@ -0,0 +1,195 @@
+# ================== jobs.py (Background Generation Jobs) ==================
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from tracing import wrap
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class QueueFull(RuntimeError):
+    pass
+
+class Cancelled(Exception):
+    pass
+
+# ----------------- JOB -----------------
+class Job:
+    """One unit of background work. The function running it reports partial output with `update`
+    and calls `check` between steps so a cancellation takes effect promptly."""
+
+    def __init__(self, owner, fn, kind="", **meta):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.kind = kind
+        self.meta = meta
+        self.fn = fn
+        self.status = QUEUED
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.trace = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, **partial):
+        with self._lock:
+            self.partial.update(partial)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        """Raise Cancelled if the job was cancelled; call between steps and inside token loops."""
+        if self._cancel.is_set():
+            raise Cancelled(f"Job {self.id} was cancelled")
+
+    def snapshot(self):
+        """Status, partial output and result as of now, safe to read from the UI thread."""
+        with self._lock:
+            partial = dict(self.partial)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "partial": partial,
+            "result": self.result,
+            "error": self.error,
+            "queued_s": round((self.started or time.time()) - self.created, 1),
+            "elapsed_s": round((self.finished or time.time()) - self.started, 1) if self.started else 0.0,
+        }
+
+# ----------------- POOL -----------------
+class JobPool:
+    """Shared worker threads that run jobs from a bounded queue, taking turns between owners.
+
+    Each owner (a browser session) has its own queue, and workers serve owners round-robin,
+    so one user queueing many jobs can't delay everyone else. `submit` raises QueueFull past
+    `max_queued` waiting jobs overall or `max_per_owner` unfinished jobs for one owner.
+    Finished jobs stay readable for `keep_finished` seconds so a refreshed page can pick
+    its result up again.
+    """
+
+    def __init__(self, workers=4, max_queued=64, max_per_owner=3, keep_finished=900):
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self._queues = OrderedDict()  # owner → deque of queued jobs, in round-robin order
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f"job-worker-{i}") for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, owner, fn, kind="", **meta):
+        """Queue `fn(job)` for `owner`; returns the Job. Its return value becomes `job.result`."""
+        job = Job(owner, fn, kind, **meta)
+        with self._cond:
+            self._prune()
+            if self._queued >= self.max_queued:
+                raise QueueFull("The server is busy; please try again in a minute.")
+            active = sum(1 for j in self.jobs.values() if j.owner == owner and j.status not in FINISHED)
+            if active >= self.max_per_owner:
+                raise QueueFull(f"You already have {active} generations running; wait for one to finish or cancel it.")
+            # Run in the submitter's trace context, like work handed to any other thread
+            job.fn = wrap(fn)
+            self.jobs[job.id] = job
+            self._queues.setdefault(owner, deque()).append(job)
+            self._queued += 1
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job: a queued job is dropped at once, a running one stops at its next `check`."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job._cancel.set()
+            queue = self._queues.get(job.owner)
+            if job.status == QUEUED and queue is not None and job in queue:
+                queue.remove(job)
+                self._queued -= 1
+                if not queue:
+                    del self._queues[job.owner]
+                job.status, job.finished = CANCELLED, time.time()
+            return job
+
+    def position(self, job_id):
+        """Jobs ahead of a queued job across all owners (approximate with round-robin), or 0."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            queue = self._queues.get(job.owner, ())
+            own = list(queue).index(job) if job in queue else 0
+            # Every other owner gets a turn before each of this owner's earlier jobs
+            return sum(min(len(q), own + 1) for o, q in self._queues.items() if o != job.owner) + own
+
+    def stats(self):
+        with self._cond:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": len(self._workers), "queued": self._queued, "owners_waiting": len(self._queues), **counts}
+
+    def _next(self):
+        """The next owner's oldest job; that owner then moves to the back of the rotation."""
+        owner, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        self._queues.move_to_end(owner)
+        if not queue:
+            del self._queues[owner]
+        self._queued -= 1
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished
+        for job_id in [i for i, j in self.jobs.items() if j.status in FINISHED and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                job = self._next()
+                job.status, job.started = RUNNING, time.time()
+            try:
+                job.check()
+                result = job.fn(job)
+            except Cancelled:
+                status, result, error = CANCELLED, None, None
+            except Exception as e:
+                status, result, error = FAILED, None, f"{type(e).__name__}: {e}"
+            else:
+                status, error = DONE, None
+            with self._cond:
+                job.result, job.error = result, error
+                job.status, job.finished = status, time.time()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_job_pool():
+    """Process-wide pool; JOB_WORKERS, JOB_QUEUE_SIZE and JOB_MAX_PER_USER size it."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = JobPool(
+                workers=int(os.getenv("JOB_WORKERS", "8")),
+                max_queued=int(os.getenv("JOB_QUEUE_SIZE", "64")),
+                max_per_owner=int(os.getenv("JOB_MAX_PER_USER", "3")),
+            )
+    return _pool
@@ -0,0 +1,247 @@
+# ================== ledger.py (Posting Ledger) ==================
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from cache import CACHE_DIR, hash_key
+from tracing import span
+from utils import normalize_text
+
+# 128 MinHash permutations split into 32 bands of 4 rows: postings with a Jaccard similarity
+# of 0.7 share at least one band bucket 99.9% of the time, and candidates are then checked
+# against `threshold` with the full signature. A repost with a new intro line and a few
+# edited words typically scores 0.75-0.9 on 3-word shingles.
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_WORDS = 3
+# Universal hashing (a*x + b) mod p over 32-bit shingle hashes, with p the largest prime below
+# 2**32 so that a*x + b never overflows uint64
+_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)
+
+# ----------------- MINHASH -----------------
+def posting_text(job):
+    """The parts of an extracted posting that identify the role, normalized for comparison."""
+    skills = job.get("skills") or []
+    if isinstance(skills, list):
+        skills = " ".join(map(str, skills))
+    parts = [job.get("role"), job.get("company_name") or job.get("company name"), job.get("description"), skills]
+    return normalize_text(" ".join(str(part) for part in parts if part))
+
+def posting_identity(job):
+    """Normalized (role, company): near-duplicates must agree on both, only the description may differ."""
+    return normalize_text(job.get("role")), normalize_text(job.get("company_name") or job.get("company name"))
+
+def shingles(text, size=SHINGLE_WORDS):
+    words = text.split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature (uint64 array) of the text's word shingles."""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64) % _PRIME
+    if not hashes.size:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: the fraction of permutations where the signatures agree."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+def band_buckets(signature):
+    """One 64-bit bucket id per band; near-duplicates are found by sharing at least one."""
+    return [(band, int.from_bytes(hashlib.blake2b(chunk.tobytes(), digest_size=8).digest(), "big", signed=True))
+            for band, chunk in enumerate(np.split(signature, BANDS))]
+
+# ----------------- LEDGER -----------------
+class Ledger:
+    """Postings already processed, with what was generated for them, and the recipients already emailed.
+
+    `find(job)` returns the stored posting whose text is identical, or which has the same
+    role and company and is estimated at least `threshold` similar (MinHash over word shingles, looked up
+    through an indexed LSH band table), so a repost under another URL can reuse earlier
+    results instead of paying for generation again. Sibling postings from one company share
+    most of a templated description, and agencies post one description for several clients,
+    so similarity alone never matches two different roles or companies.
+    A disabled ledger never matches and never stores.
+    """
+
+    def __init__(self, path=None, threshold=0.7, enabled=True):
+        self.path = path or os.path.join(CACHE_DIR, "ledger.sqlite")
+        self.threshold = threshold
+        self.enabled = enabled
+        self.lookups = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS postings (
+                   id INTEGER PRIMARY KEY,
+                   url TEXT,
+                   fingerprint TEXT NOT NULL,
+                   role TEXT,
+                   company TEXT,
+                   signature BLOB NOT NULL,
+                   result TEXT NOT NULL DEFAULT '{}',
+                   created REAL NOT NULL,
+                   updated REAL NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS postings_fingerprint ON postings(fingerprint);
+               CREATE INDEX IF NOT EXISTS postings_url ON postings(url);
+               CREATE TABLE IF NOT EXISTS posting_bands (
+                   band INTEGER NOT NULL,
+                   bucket INTEGER NOT NULL,
+                   posting_id INTEGER NOT NULL,
+                   PRIMARY KEY (band, bucket, posting_id)
+               ) WITHOUT ROWID;
+               CREATE TABLE IF NOT EXISTS sent (
+                   id INTEGER PRIMARY KEY,
+                   recipient TEXT NOT NULL,
+                   subject TEXT,
+                   posting_id INTEGER,
+                   sent_at REAL NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS sent_recipient ON sent(recipient, sent_at);"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row(row, match, score):
+        return {
+            "id": row["id"],
+            "url": row["url"],
+            "role": row["role"],
+            "company": row["company"],
+            "created": row["created"],
+            "result": json.loads(row["result"]),
+            "match": match,
+            "similarity": round(score, 3),
+        }
+
+    def _find(self, fingerprint, signature, identity):
+        row = self._conn.execute("SELECT * FROM postings WHERE fingerprint = ? LIMIT 1", (fingerprint,)).fetchone()
+        if row is not None:
+            return self._row(row, "exact", 1.0)
+        candidates = set()
+        for band, bucket in band_buckets(signature):
+            candidates.update(pid for (pid,) in self._conn.execute(
+                "SELECT posting_id FROM posting_bands WHERE band = ? AND bucket = ?", (band, bucket)))
+        best, best_score = None, self.threshold
+        candidates = list(candidates)
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            query = f"SELECT * FROM postings WHERE id IN ({','.join('?' * len(chunk))})"
+            for row in self._conn.execute(query, chunk):
+                if (normalize_text(row["role"]), normalize_text(row["company"])) != identity:
+                    continue
+                score = similarity(signature, np.frombuffer(row["signature"], dtype=np.uint32))
+                if score >= best_score:
+                    best, best_score = row, score
+        return self._row(best, "near", best_score) if best is not None else None
+
+    def find(self, job):
+        """The stored posting matching `job` ({"id", "url", "result", "match", "similarity", ...}), or None."""
+        if not self.enabled or not isinstance(job, dict):
+            return None
+        text = posting_text(job)
+        if not text:
+            return None
+        with span("ledger_lookup") as current:
+            signature = minhash(text)
+            with self._lock:
+                self.lookups += 1
+                found = self._find(hashlib.sha256(text.encode("utf-8")).hexdigest(), signature, posting_identity(job))
+                self.duplicates += found is not None
+            current.set(duplicate=found is not None, similarity=found["similarity"] if found else 0.0)
+        return found
+
+    def record(self, job, url=None, result=None):
+        """Store `job` with `result` merged into anything already stored for the same posting; returns its id."""
+        if not self.enabled or not isinstance(job, dict):
+            return None
+        text = posting_text(job)
+        if not text:
+            return None
+        signature = minhash(text)
+        fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            found = self._find(fingerprint, signature, posting_identity(job))
+            if found is not None:
+                merged = {**found["result"], **(result or {})}
+                self._conn.execute(
+                    "UPDATE postings SET result = ?, url = COALESCE(url, ?), updated = ? WHERE id = ?",
+                    (json.dumps(merged, default=str), url, now, found["id"]),
+                )
+                self._conn.commit()
+                return found["id"]
+            cursor = self._conn.execute(
+                "INSERT INTO postings (url, fingerprint, role, company, signature, result, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, fingerprint, job.get("role"), job.get("company_name") or job.get("company name"),
+                 signature.astype(np.uint32).tobytes(), json.dumps(result or {}, default=str), now, now),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO posting_bands (band, bucket, posting_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in band_buckets(signature)],
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def record_sent(self, recipient, subject=None, posting_id=None):
+        if not self.enabled or not recipient:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sent (recipient, subject, posting_id, sent_at) VALUES (?, ?, ?, ?)",
+                (recipient.strip().lower(), subject, posting_id, time.time()),
+            )
+            self._conn.commit()
+
+    def last_sent(self, recipient):
+        """The most recent email to `recipient` ({"subject", "posting_id", "sent_at"}), or None."""
+        if not self.enabled or not recipient:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT subject, posting_id, sent_at FROM sent WHERE recipient = ? ORDER BY sent_at DESC LIMIT 1",
+                (recipient.strip().lower(),),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self):
+        with self._lock:
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+            sent = self._conn.execute("SELECT COUNT(*) FROM sent").fetchone()[0]
+        return {"postings": postings, "sent": sent, "lookups": self.lookups, "duplicates": self.duplicates}
+
+def resume_key(resume):
+    """Identifies the resume generated text was written from, so it is only reused for the same one."""
+    return hash_key("resume", resume.get("text", ""))[:16]
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    """Process-wide ledger. Set LEDGER=off to disable duplicate detection and sent tracking."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = Ledger(
+                threshold=float(os.getenv("LEDGER_THRESHOLD", "0.7")),
+                enabled=os.getenv("LEDGER", "on").lower() not in ("off", "0", "false"),
+            )
+    return _ledger
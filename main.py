@@ -1,107 +1,363 @@
 # ================== main.py (Full Agentic Version) ==================
 
 import os
+import importlib
+import threading
 import streamlit as st
 from dotenv import load_dotenv
-from chains import Chain, IndividualChain
-from portfolio import Portfolio
-from utils import clean_text
-from langchain_community.document_loaders import WebBaseLoader
-import pdfplumber
-from docx import Document
-from docx import Document as DocxDocument
-from io import BytesIO
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import base64
-import pickle
+from tracing import span, trace
+from jobs import FINISHED, QUEUED, QueueFull, get_job_pool
 import datetime
+import time
+import uuid
 
+# Only Streamlit and the standard library load at startup. LangChain, Groq, Chroma, pandas,
+# the Google clients and the resume parsers are imported by the page or resource that needs them.
 load_dotenv()
 
-# ----------------- GMAIL AUTHENTICATION -----------------
-def authenticate_gmail():
-    SCOPES = ['https://mail.google.com/']
-    creds = None
-
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    credentials_path = os.path.join(current_dir, 'credentials.json')
-    token_path = os.path.join(current_dir, "token.pickle")
-
-    if os.path.exists(token_path):
-        with open(token_path, "rb") as token:
-            creds = pickle.load(token)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=8080)
-        with open(token_path, "wb") as token:
-            pickle.dump(creds, token)
-
-    service = build('gmail', 'v1', credentials=creds)
-    profile = service.users().getProfile(userId='me').execute()
-    from_email = profile['emailAddress']
-    return service, from_email
-
-# ----------------- SEND EMAIL WITH ATTACHMENTS -----------------
-def send_email_with_attachments(service, from_email, to_email, subject, body_text, resume_file, cover_letter_text):
-    message = MIMEMultipart()
-    message['to'] = to_email
-    message['from'] = from_email
-    message['subject'] = subject
-
-    # Attach body
-    message.attach(MIMEText(body_text, 'plain'))
-
-    # Attach resume
+# ----------------- SHARED RESOURCES -----------------
+# Built once per server process and shared by every rerun and session.
+@st.cache_resource
+def get_individual_chain():
+    from chains import IndividualChain
+    return IndividualChain()
+
+@st.cache_resource
+def get_chain():
+    from chains import Chain
+    return Chain()
+
+@st.cache_resource
+def get_portfolio(file_path):
+    from portfolio import Portfolio
+    portfolio = Portfolio(file_path=file_path)
+    portfolio.load_portfolio()
+    return portfolio
+
+@st.cache_resource
+def get_resume_parser():
+    from resume import ResumeParser
+    return ResumeParser()
+
+@st.cache_resource
+def get_outbox():
+    """Durable outbox plus the one background worker that sends from it with a cached Gmail client."""
+    from outbox import GmailService, Outbox, OutboxWorker
+    outbox = Outbox()
+    worker = OutboxWorker(outbox, GmailService())
+    worker.start()
+    return outbox, worker
+
+def send_via_outbox(to_email, from_email, subject, body_text, resume_file=None, cover_letter_text=None, posting_id=None,
+                    resend=False):
+    """Queue a message, nudge the worker, and wait briefly so the user sees the outcome.
+
+    `resend` sends a message identical to one already sent again instead of treating it as a duplicate click.
+    """
+    from ledger import get_ledger
+    outbox, worker = get_outbox()
+    # Authenticate here, in the script thread, so a first-time OAuth prompt is tied to the user's action
+    worker.gmail.connect()
+    attachments = []
     if resume_file:
-        resume_part = MIMEBase('application', 'octet-stream')
-        resume_part.set_payload(resume_file.read())
-        encoders.encode_base64(resume_part)
-        resume_part.add_header('Content-Disposition', f'attachment; filename="{resume_file.name}"')
-        message.attach(resume_part)
-
-    # Attach generated cover letter as a .docx file
-    cover_letter_doc = DocxDocument()
-    for line in cover_letter_text.split('\n'):
-        cover_letter_doc.add_paragraph(line)
-    cover_letter_io = BytesIO()
-    cover_letter_doc.save(cover_letter_io)
-    cover_letter_io.seek(0)
-
-    cover_letter_part = MIMEBase('application', 'vnd.openxmlformats-officedocument.wordprocessingml.document')
-    cover_letter_part.set_payload(cover_letter_io.read())
-    encoders.encode_base64(cover_letter_part)
-    cover_letter_part.add_header('Content-Disposition', 'attachment', filename="Cover_Letter.docx")
-    message.attach(cover_letter_part)
-
-    raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-    body = {'raw': raw_message}
-
-    sent_message = service.users().messages().send(userId="me", body=body).execute()
-    return sent_message
+        # getvalue() reads the whole upload regardless of where earlier reads left the stream
+        attachments.append(outbox.attachments.add_bytes(resume_file.getvalue(), resume_file.name))
+    if cover_letter_text is not None:
+        attachments.append(outbox.attachments.add_cover_letter(cover_letter_text))
+    with span("send", attachments=len(attachments)) as current:
+        message_id = outbox.enqueue(to_email, from_email, subject, body_text, attachments, resend=resend)
+        worker.wake()
+        record = outbox.wait_for(message_id, timeout=30)
+        current.set(status=record["status"], attempts=record["attempts"])
+    if record["status"] == "sent":
+        # Only confirmed sends count; a message still retrying is kept from going out twice by its outbox id
+        get_ledger().record_sent(to_email, subject, posting_id)
+    return record
+
+def confirm_repeat_send(to_email, key):
+    """Warn if `to_email` was already emailed. Returns (allowed, resend): sending is allowed when there is
+    no earlier email or the user confirms sending again, and `resend` is set in the latter case."""
+    from ledger import get_ledger
+    previous = get_ledger().last_sent(to_email) if to_email else None
+    if previous is None:
+        return True, False
+    when = datetime.datetime.fromtimestamp(previous["sent_at"]).strftime("%b %d, %Y at %H:%M")
+    st.warning(f"⚠ You already emailed {to_email} on {when}" + (f" (\"{previous['subject']}\")" if previous["subject"] else "") + ".")
+    confirmed = st.checkbox("Send to this recipient again anyway", key=key)
+    return confirmed, confirmed
+
+# ----------------- IMPORT WARM-UP -----------------
+# Heaviest first, so the first click is most likely to find them already loaded
+WARM_MODULES = ("chains", "langchain_groq", "chromadb", "pandas", "pipeline", "crawler", "portfolio",
+                "googleapiclient.discovery", "google_auth_oauthlib.flow", "outbox", "resume", "pdfplumber", "docx")
+
+@st.cache_resource
+def start_import_warmup():
+    """Import the heavy modules in a background thread once per process, after the first page is on screen.
+
+    Set WARM_IMPORTS=off to load them only on demand.
+    """
+    def warm():
+        started = time.perf_counter()
+        for name in WARM_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Warm-up import of {name} failed: {e}")
+        print(f"Warm-up imports finished in {time.perf_counter() - started:.1f}s")
+
+    if os.getenv("WARM_IMPORTS", "on").lower() in ("off", "0", "false"):
+        return None
+    thread = threading.Thread(target=warm, daemon=True, name="import-warmup")
+    thread.start()
+    return thread
+
+# ----------------- CHECKPOINTS -----------------
+def restore_checkpoint(key, skip=False):
+    """(True, output) if a stage output is checkpointed under `key` (and `skip` is not set), else (False, None)."""
+    from checkpoints import get_checkpoints
+    checkpoints = get_checkpoints()
+    found, output = (False, None) if skip else checkpoints.load(key)
+    checkpoints.count(found)
+    return found, output
+
+# ----------------- BACKGROUND JOBS -----------------
+# Generation runs on the shared job pool (jobs.py), not in the session's script thread, so one
+# session's LLM calls don't hold up another's and a refreshed page can reattach to its job.
+# Job functions never call st.*: they report progress with task.update() and stop at task.check().
+def session_owner():
+    """Id for this browser tab, kept in the URL so it survives a refresh; the pool takes turns between owners."""
+    if "sid" not in st.query_params:
+        st.query_params["sid"] = uuid.uuid4().hex[:12]
+    return st.query_params["sid"]
+
+def submit_job(kind, fn, **meta):
+    """Queue `fn(task)` for this session and remember the job in the URL; False (with a warning) if the pool is full."""
+    try:
+        task = get_job_pool().submit(session_owner(), fn, kind, **meta)
+    except QueueFull as e:
+        st.warning(f"⏳ {e}")
+        return False
+    st.query_params["job"] = task.id
+    return True
+
+def own_job(job_id):
+    """The job with this id if it belongs to this session, else None; a job id pasted into another tab's URL is ignored."""
+    task = get_job_pool().get(job_id) if job_id else None
+    return task if task is not None and task.owner == session_owner() else None
+
+def current_job(kind):
+    """Snapshot of this page's job from the URL, or None."""
+    task = own_job(st.query_params.get("job"))
+    return task.snapshot() | {"trace": task.trace} if task is not None and task.kind == kind else None
+
+def stream_into(task, field, tokens):
+    """Collect streamed tokens into task.partial[field] as they arrive and return the full text."""
+    text = ""
+    for token in tokens:
+        task.check()
+        text += token
+        task.update(**{field: text})
+    return text.strip()
+
+@st.fragment(run_every=1.0)
+def job_progress(job_id, render_partial):
+    """Poll a running job once a second: status, partial output and a Cancel button. Reruns the page when it ends."""
+    pool = get_job_pool()
+    task = own_job(job_id)
+    if task is None:
+        st.warning("⚠ This generation is no longer available; please start it again.")
+        return
+    snapshot = task.snapshot()
+    if snapshot["status"] in FINISHED:
+        st.rerun()
+    if snapshot["status"] == QUEUED:
+        ahead = pool.position(job_id)
+        st.info(f"⏳ Waiting for a free worker ({ahead} ahead of you, {snapshot['queued_s']:.0f}s so far)…")
+    elif task.cancelled:
+        st.info("✖ Cancelling…")
+    else:
+        st.info(f"⚙️ {snapshot['partial'].get('stage', 'Working')}… ({snapshot['elapsed_s']:.0f}s)")
+    render_partial(snapshot["partial"])
+    if st.button("✖ Cancel", key=f"cancel_{job_id}"):
+        pool.cancel(job_id)
+        st.rerun()
+
+def generate_individual(task, chain, parser, job_url, resume_bytes, resume_type, regenerate):
+    """Job: the individual pipeline, streaming the cover letter and cold email into task.partial."""
+    from checkpoints import get_checkpoints
+    from ledger import get_ledger
+    from pipeline import checkpoint_key, generated_result, individual_pipeline
+
+    with trace("individual", job_url=job_url) as collected:
+        task.trace = collected
+        task.update(stage="Reading the job posting and your resume")
+        # Page fetch → job extraction and resume parsing → contact info run side by side;
+        # the recruiter lookup keeps running in the background while the letter streams in.
+        # Extraction and the recruiter lookup are restored from checkpoints when the page is unchanged.
+        checkpoints = get_checkpoints()
+        run = individual_pipeline(
+            chain, job_url,
+            lambda: parser.parse(resume_bytes, resume_type),
+            generate=False,
+            ledger=get_ledger(),
+        ).start(checkpoints=checkpoints)
+
+        job = run.result("job")
+        resume = run.result("resume")
+        applicant_info = run.result("applicant")
+        duplicate = run.result("duplicate")
+        previous = None if regenerate else run.result("previous")
+        task.check()
+
+        if previous:
+            cover_letter, cold_email = previous["cover_letter"], previous["cold_email"]
+            posting_id = duplicate["id"]
+        else:
+            # Keyed like the pipeline's own cover_letter and cold_email stages, so letters written
+            # by batch runs are picked up here and vice versa
+            task.update(stage="Writing the cover letter")
+            with span("stage.cover_letter"):
+                letter_key = checkpoint_key(checkpoints, chain, "cover_letter", job=job, resume=resume)
+                restored, cover_letter = restore_checkpoint(letter_key, skip=regenerate)
+                if not restored:
+                    cover_letter = stream_into(task, "cover_letter", chain.stream_cover_letter(job, resume["profile"]))
+                    checkpoints.save(letter_key, cover_letter)
+            task.update(cover_letter=cover_letter, stage="Writing the cold email")
+
+            with span("stage.cold_email"):
+                # Keyed before streaming: building the prompt updates applicant_info's name
+                email_key = checkpoint_key(checkpoints, chain, "cold_email", job=job, applicant=applicant_info,
+                                           cover_letter=cover_letter)
+                restored, cold_email = restore_checkpoint(email_key, skip=regenerate)
+                if not restored:
+                    raw_email = stream_into(task, "cold_email", chain.stream_cold_email(job, applicant_info, cover_letter))
+                    # Signature clean-up needs the complete email, so the raw stream is only shown while it arrives
+                    cold_email = chain.finalize_cold_email(raw_email, applicant_info)
+                    checkpoints.save(email_key, cold_email)
+            posting_id = get_ledger().record(job, url=job_url, result=generated_result(resume, cover_letter, cold_email))
+
+        task.update(cold_email=cold_email, stage="Looking up the recruiter's email")
+        recruiter_email = run.result("recruiter_email")
+
+    return {
+        "cover_letter": cover_letter,
+        "cold_email": cold_email,
+        "recruiter_email": recruiter_email,
+        "posting_id": posting_id,
+        "duplicate": duplicate if previous else None,
+    }
+
+def generate_organization(task, chain, portfolio, hunter, url, follow_links):
+    """Job: extract the careers page's postings and write an email for each, reporting them as they finish."""
+    from checkpoints import get_checkpoints
+    from crawler import crawl_jobs
+    from ledger import get_ledger
+    from pages import load_page
+    from pipeline import organization_outreach, organization_versions
+
+    with trace("organization", url=url) as collected:
+        task.trace = collected
+        task.update(stage="Finding job postings")
+        with span("stage.extract_jobs"):
+            if follow_links:
+                # Crawl the careers index and its posting pages, extracting each page as it arrives
+                jobs = crawl_jobs(chain, [url], max_pages=50)
+            else:
+                # An unchanged page restores its extracted jobs instead of calling the model again
+                text = load_page(url)["text"]
+                jobs = get_checkpoints().cached(
+                    "jobs", organization_versions(chain)["jobs"], [text], lambda: chain.extract_jobs(text))
+        task.check()
+
+        results = [None] * len(jobs)
+        lock = threading.Lock()
+        task.update(stage=f"Writing {len(jobs)} organization cold email(s)", total=len(jobs), results=list(results))
+
+        def on_text(i, text):
+            # Called from the outreach workers while email i streams in
+            task.check()
+            with lock:
+                results[i] = {"job": jobs[i], "email": text, "error": None, "streaming": True}
+                task.update(results=list(results))
+
+        outreach = organization_outreach(chain, portfolio, hunter, jobs, ledger=get_ledger(),
+                                         checkpoints=get_checkpoints(), on_text=on_text)
+        try:
+            for i, result in outreach:
+                with lock:
+                    results[i] = result
+                    task.update(results=list(results))
+                task.check()
+        finally:
+            outreach.close()
+    return {"results": results}
+
+def show_individual_partial(partial):
+    if partial.get("cover_letter"):
+        st.subheader("📄 Generated Cover Letter")
+        st.code(partial["cover_letter"], language='markdown')
+    if partial.get("cold_email"):
+        st.subheader("📧 Generated Cold Email")
+        st.text(partial["cold_email"])
+
+def show_organization_partial(partial):
+    results = partial.get("results") or []
+    if not results:
+        return
+    started = [result for result in results if result is not None]
+    finished = [result for result in started if not result.get("streaming")]
+    st.progress(len(finished) / len(results))
+    for result in started:
+        role = result["job"].get("role") or "Untitled role"
+        if result["error"]:
+            st.error(f"❌ {role}: {result['error']}")
+        elif result.get("streaming"):
+            with st.expander(f"✍️ {role} (writing…)", expanded=True):
+                st.text(result["email"])
+        else:
+            with st.expander(f"✅ {role}"):
+                st.text(result["email"])
+
+# ----------------- TRACE PANEL -----------------
+def render_trace(collected):
+    """Where the time went in the last run: totals per span name, then every span in start order."""
+    summary = collected.summary()
+
+    def seconds(name):
+        return summary.get(name, {}).get("total_ms", 0.0) / 1000
+
+    llm = summary.get("llm", {})
+    with st.expander("⏱ Where the time went"):
+        cols = st.columns(4)
+        cols[0].metric("Total", f"{seconds(collected.name):.1f}s")
+        cols[1].metric("LLM", f"{seconds('llm'):.1f}s", help=(
+            f"{llm.get('count', 0)} calls, {llm.get('prompt_tokens', 0)} prompt + "
+            f"{llm.get('completion_tokens', 0)} completion tokens, {llm.get('cache_hits', 0)} cache hits"
+        ))
+        cols[2].metric("Hunter.io", f"{seconds('hunter'):.1f}s")
+        cols[3].metric("Page fetch", f"{seconds('fetch'):.1f}s")
+        st.dataframe([{"span": name, **totals} for name, totals in summary.items()], use_container_width=True)
+        st.dataframe(collected.rows(), use_container_width=True)
 
 # ----------------- PAGE NAVIGATION -----------------
+# The page is mirrored into the URL so a refresh comes back to it (and to its running job)
 def go_to_individual():
     st.session_state.page = 'individual'
+    st.query_params["page"] = 'individual'
 
 def go_to_organization():
     st.session_state.page = 'organization'
+    st.query_params["page"] = 'organization'
 
 def go_home():
     st.session_state.page = 'landing'
+    for name in ("page", "job"):
+        st.query_params.pop(name, None)
 
 # ----------------- MAIN APP -----------------
 if 'page' not in st.session_state:
-    st.session_state.page = 'landing'
+    st.session_state.page = st.query_params.get("page", 'landing')
 
 if st.session_state.page == 'landing':
     st.set_page_config(page_title="Cold Email Assistant", page_icon="📧")
@@ -117,63 +373,60 @@ if st.session_state.page == 'landing':
 elif st.session_state.page == 'individual':
     st.title("🚀 Cold Email Generator for Individuals")
 
-    chain = IndividualChain()
-    action_log = []
+    chain = get_individual_chain()
 
     uploaded_resume = st.file_uploader("Upload your Resume (.pdf, .docx, .txt)", type=["pdf", "docx", "txt"])
     job_url = st.text_input("Paste a Job URL here")
+    regenerate = st.checkbox("♻️ Regenerate even if I've already processed this posting")
 
     if st.button("Generate Cold Email", disabled=not (uploaded_resume and job_url)):
-        try:
-            action_log.append("Loading and cleaning job page.")
-            loader = WebBaseLoader([job_url])
-            page_data = loader.load().pop().page_content
-            cleaned_data = clean_text(page_data)
-
-            action_log.append("Extracting job information using LLM.")
-            job = chain.extract_job_info(cleaned_data)
-
-            resume_text = ""
-            if uploaded_resume.type == "application/pdf":
-                with pdfplumber.open(uploaded_resume) as pdf:
-                    for page in pdf.pages:
-                        resume_text += page.extract_text()
-            elif uploaded_resume.type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-                doc = Document(uploaded_resume)
-                resume_text = "\n".join([para.text for para in doc.paragraphs])
-            elif uploaded_resume.type == "text/plain":
-                resume_text = uploaded_resume.read().decode('utf-8')
-
-            action_log.append("Extracting applicant information from resume.")
-            applicant_info = chain.extract_contact_info(resume_text)
-
-            recruiter_email = job.get("recruiter_email")
-            if not recruiter_email:
-                action_log.append("Primary recruiter email not found, attempting fallback lookup.")
-                recruiter_email = chain.lookup_recruiter_email(job.get("recruiter_name", ""), job.get("company_name", ""))
-            st.session_state.hunter_recruiter_email = recruiter_email or "hr@company.com"  # fallback if lookup fails
-
-            action_log.append("Generating cover letter and cold email.")
-            cover_letter = chain.generate_cover_letter(job, resume_text)
-            cold_email = chain.generate_cold_email(job, applicant_info, cover_letter)
-
-            st.session_state.generated_email = cold_email
-            st.session_state.generated_cover_letter = cover_letter
+        parser = get_resume_parser()
+        resume_bytes, resume_type = uploaded_resume.getvalue(), uploaded_resume.type
+        if submit_job("individual", lambda task: generate_individual(
+                task, chain, parser, job_url, resume_bytes, resume_type, regenerate), job_url=job_url):
+            st.session_state.email_ready = False
+
+    job = current_job("individual")
+    if job is not None and job["status"] not in FINISHED:
+        job_progress(job["id"], show_individual_partial)
+    elif job is not None and st.session_state.get("individual_job") != job["id"]:
+        # First rerun after the job ended (or after a refresh): take its results into the session
+        st.session_state.individual_job = job["id"]
+        st.session_state.individual_trace = job["trace"]
+        st.session_state.individual_error = job["error"] if job["status"] == "failed" else None
+        if job["status"] == "done":
+            result = job["result"]
+            st.session_state.generated_email = result["cold_email"]
+            st.session_state.generated_cover_letter = result["cover_letter"]
+            st.session_state.editable_email = result["cold_email"]
+            st.session_state.hunter_recruiter_email = result["recruiter_email"] or "hr@company.com"  # fallback if lookup fails
+            st.session_state.posting_id = result["posting_id"]
+            st.session_state.individual_duplicate = result["duplicate"]
             st.session_state.email_ready = True
 
-            st.subheader("📄 Generated Cover Letter")
-            st.code(cover_letter, language='markdown')
-
-            st.subheader("📧 Generated Cold Email")
-            editable_email = st.text_area("📝 Edit Cold Email Before Sending:", value=cold_email, height=300)
-            st.session_state.editable_email = editable_email
+    if st.session_state.get("individual_error"):
+        st.error(f"❌ Error occurred during generation: {st.session_state.individual_error}")
+    elif job is not None and job["status"] == "cancelled":
+        st.warning("✖ Generation cancelled.")
 
-            st.success("✅ Cold Email Generated Successfully!")
-            st.session_state.action_log = action_log
-
-        except Exception as e:
-            st.error(f"❌ Error occurred during generation: {e}")
-            action_log.append(f"Error: {e}")
+    if st.session_state.get("email_ready", False):
+        duplicate = st.session_state.get("individual_duplicate")
+        if duplicate:
+            seen = datetime.datetime.fromtimestamp(duplicate["created"]).strftime("%b %d, %Y")
+            st.info(f"♻️ You already processed this posting on {seen}"
+                    + (f" ({duplicate['url']})" if duplicate["url"] and duplicate["url"] != job_url else "")
+                    + ". Showing the letter and email written then; tick \"Regenerate\" for new ones.")
+        st.subheader("📄 Generated Cover Letter")
+        st.code(st.session_state.generated_cover_letter, language='markdown')
+        st.subheader("📧 Generated Cold Email")
+        st.session_state.editable_email = st.text_area(
+            "📝 Edit Cold Email Before Sending:", value=st.session_state.generated_email, height=300,
+            key=f"individual_email_{st.session_state.individual_job}",
+        )
+        st.success("✅ Cold Email Generated Successfully!")
+
+    if st.session_state.get("individual_trace") is not None:
+        render_trace(st.session_state.individual_trace)
 
     if st.session_state.get("email_ready", False):
         st.divider()
@@ -181,30 +434,33 @@ elif st.session_state.page == 'individual':
 
         final_receiver_email = st.text_input("📨 Enter the Email Address to whom the mail should be sent:")
         your_email = st.text_input("✉ Enter Your Own Email Address (From Address):")
+        send_allowed, resend = confirm_repeat_send(final_receiver_email, "resend_individual")
 
-        if st.button("📤 Confirm and Send Email Now"):
+        if st.button("📤 Confirm and Send Email Now", disabled=not send_allowed):
             try:
                 if not final_receiver_email:
                     st.error("❗ Please enter recipient's Email Address.")
                 elif not your_email:
                     st.error("❗ Please enter your Email Address.")
                 else:
-                    service, from_email = authenticate_gmail()
-
-                    send_email_with_attachments(
-                        service=service,
-                        from_email=your_email,
+                    record = send_via_outbox(
                         to_email=final_receiver_email,
+                        from_email=your_email,
                         subject="Exciting Career Opportunity Inquiry",
                         body_text=st.session_state.editable_email,
                         resume_file=uploaded_resume,
-                        cover_letter_text=st.session_state.generated_cover_letter
+                        cover_letter_text=st.session_state.generated_cover_letter,
+                        posting_id=st.session_state.get("posting_id"),
+                        resend=resend,
                     )
 
-                    st.success(f"✅ Email with attachments sent to {final_receiver_email}!")
-                    st.balloons()
-
-                    
+                    if record["status"] == "sent":
+                        st.success(f"✅ Email with attachments sent to {final_receiver_email}!")
+                        st.balloons()
+                    elif record["status"] == "failed":
+                        st.error(f"❌ Error sending email: {record['last_error']}")
+                    else:
+                        st.warning(f"⏳ Email queued; retrying in the background (attempt {record['attempts']}): {record['last_error'] or 'still sending'}")
 
             except Exception as e:
                 st.error(f"❌ Error sending email: {e}")
@@ -216,93 +472,95 @@ elif st.session_state.page == 'individual':
 elif st.session_state.page == 'organization':
     st.title("🏢 Cold Email Generator for Organizations")
 
-    chain = Chain()
-    portfolio = Portfolio(file_path=r"/Users/juhianand/Documents/UIC/Spring/DeepLearning/Cold_Email_Project/app/resource/my_portfolio.csv")
-    action_log = []
+    chain = get_chain()
+    portfolio = get_portfolio(r"/Users/juhianand/Documents/UIC/Spring/DeepLearning/Cold_Email_Project/app/resource/my_portfolio.csv")
 
     url_input = st.text_input("🌐 Enter Organization Careers Page URL:")
+    follow_links = st.checkbox("🔗 Follow links to individual job postings on this page")
 
     if st.button("🔍 Generate Organization Cold Email", disabled=not url_input):
-        try:
-            action_log.append("Loading and cleaning organization's careers page.")
-            loader = WebBaseLoader([url_input])
-            page_data = loader.load().pop().page_content
-            cleaned_data = clean_text(page_data)
-
-            action_log.append("Extracting job descriptions using LLM.")
-            jobs = chain.extract_jobs(cleaned_data)
-
-            if jobs:
-                job = jobs[0]  # For now, take the first job found
-                skills = job.get("skills", [])
-                links = portfolio.query_links(skills)
-
-                action_log.append("Generating cold email for organization.")
-                cold_email = chain.write_mail(job, links)
-
-                # Recruiter Email Handling
-                recruiter_name = job.get("recruiter_name", "")
-                company_name = job.get("company_name", "")
-
-                hunter_chain = IndividualChain()
-                hunter_email = ""
-                if recruiter_name and company_name:
-                    hunter_email = hunter_chain.lookup_recruiter_email(recruiter_name, company_name)
-                st.session_state.hunter_recruiter_email_org = hunter_email or "hr@company.com"
-
-                st.session_state.generated_org_email = cold_email
-                st.session_state.org_email_ready = True
-
-                st.subheader("📧 Generated Organization Cold Email")
-                editable_org_email = st.text_area("📝 Edit Organization Cold Email Before Sending:", value=cold_email, height=300)
-                st.session_state.editable_org_email = editable_org_email
-
-                st.success("✅ Organization Cold Email Generated!")
-                st.session_state.org_action_log = action_log
-
-            else:
-                st.warning("⚠ No jobs found from the careers page.")
-                action_log.append("No jobs extracted.")
+        hunter = get_individual_chain().hunter
+        if submit_job("organization", lambda task: generate_organization(
+                task, chain, portfolio, hunter, url_input, follow_links), url=url_input):
+            st.session_state.org_email_ready = False
+
+    job = current_job("organization")
+    if job is not None and job["status"] not in FINISHED:
+        job_progress(job["id"], show_organization_partial)
+    elif job is not None and st.session_state.get("org_job") != job["id"]:
+        # First rerun after the job ended (or after a refresh): take its results into the session
+        st.session_state.org_job = job["id"]
+        st.session_state.org_trace = job["trace"]
+        st.session_state.org_error = job["error"] if job["status"] == "failed" else None
+        if job["status"] == "done":
+            st.session_state.org_results = job["result"]["results"]
+            st.session_state.org_email_ready = bool(job["result"]["results"])
+
+    if st.session_state.get("org_error"):
+        st.error(f"❌ Error occurred during organization cold email generation: {st.session_state.org_error}")
+    elif job is not None and job["status"] == "cancelled":
+        st.warning("✖ Generation cancelled.")
+    elif job is not None and job["status"] == "done":
+        results = job["result"]["results"]
+        if results:
+            st.success(f"✅ {sum(not r['error'] for r in results)} of {len(results)} Organization Cold Emails Generated!")
+            reused = sum(bool(r["duplicate"]) for r in results)
+            if reused:
+                st.info(f"♻️ {reused} of these postings were already processed; their earlier emails were reused.")
+        else:
+            st.warning("⚠ No jobs found from the careers page.")
 
-        except Exception as e:
-            st.error(f"❌ Error occurred during organization cold email generation: {e}")
-            action_log.append(f"Error: {e}")
+    if st.session_state.get("org_trace") is not None:
+        render_trace(st.session_state.org_trace)
 
     if st.session_state.get("org_email_ready", False):
         st.divider()
-        st.info(f"*Recruiter's Email (via Hunter.io):* {st.session_state.hunter_recruiter_email_org or 'Not Found'}")
-
-        final_receiver_email = st.text_input("📨 Enter the Organization Email Address to send to:")
         your_email = st.text_input("✉ Enter Your Own Email Address (From Address):")
 
-        if st.button("📤 Confirm and Send Organization Email"):
-            try:
-                if not final_receiver_email:
-                    st.error("❗ Please enter recipient's Email Address.")
-                elif not your_email:
-                    st.error("❗ Please enter your Email Address.")
-                else:
-                    service, from_email = authenticate_gmail()
-
-                    # Now sending simple text email without attachments
-                    message = MIMEText(st.session_state.editable_org_email)
-                    message['to'] = final_receiver_email
-                    message['from'] = your_email
-                    message['subject'] = "Exciting Collaboration Opportunity with InnovaEdge Technologies"
-
-                    raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
-                    body = {'raw': raw}
-
-                    sent_message = service.users().messages().send(userId="me", body=body).execute()
-
-                    if sent_message and sent_message.get("id"):
-                        st.success(f"✅ Organization Email sent to {final_receiver_email}!")
-                        st.balloons()
-                        
-                    else:
-                        st.error("❌ Failed to send Organization Email.")
-
-            except Exception as e:
-                st.error(f"❌ Error sending Organization email: {e}")
+        for i, result in enumerate(st.session_state.org_results):
+            role = result["job"].get("role") or "Untitled role"
+            company = result["job"].get("company_name") or result["job"].get("company name") or ""
+            if result["error"]:
+                st.error(f"❌ {role}: {result['error']}")
+                continue
+            label = f"📧 {role}" + (f" — {company}" if company else "") + (" (♻️ seen before)" if result["duplicate"] else "")
+            with st.expander(label):
+                st.info(f"*Recruiter's Email (via Hunter.io):* {result['recruiter_email'] or 'Not Found'}")
+                body = st.text_area("📝 Edit Cold Email Before Sending:", value=result["email"], height=300, key=f"org_email_{st.session_state.org_job}_{i}")
+                final_receiver_email = st.text_input(
+                    "📨 Email Address to send to:", value=result["recruiter_email"] or "hr@company.com", key=f"org_to_{st.session_state.org_job}_{i}"
+                )
+                send_allowed, resend = confirm_repeat_send(final_receiver_email, f"org_resend_{i}")
+
+                if st.button("📤 Confirm and Send", key=f"org_send_{i}", disabled=not send_allowed):
+                    try:
+                        if not final_receiver_email:
+                            st.error("❗ Please enter recipient's Email Address.")
+                        elif not your_email:
+                            st.error("❗ Please enter your Email Address.")
+                        else:
+                            # Now sending simple text email without attachments
+                            record = send_via_outbox(
+                                to_email=final_receiver_email,
+                                from_email=your_email,
+                                subject="Exciting Collaboration Opportunity with InnovaEdge Technologies",
+                                body_text=body,
+                                posting_id=result["posting_id"],
+                                resend=resend,
+                            )
+
+                            if record["status"] == "sent":
+                                st.success(f"✅ Organization Email sent to {final_receiver_email}!")
+                                st.balloons()
+                            elif record["status"] == "failed":
+                                st.error(f"❌ Failed to send Organization Email: {record['last_error']}")
+                            else:
+                                st.warning(f"⏳ Organization Email queued; retrying in the background (attempt {record['attempts']}).")
+
+                    except Exception as e:
+                        st.error(f"❌ Error sending Organization email: {e}")
 
     st.button("⬅ Back", on_click=go_home)
+
+# Everything above has been sent to the browser by now, so warming up doesn't delay first paint
+start_import_warmup()
@@ -0,0 +1,292 @@
+# ================== outbox.py (Durable Gmail Outbox) ==================
+import os
+import time
+import random
+import pickle
+import sqlite3
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+import base64
+from attachments import AttachmentStore
+from cache import CACHE_DIR, hash_key
+from ratelimit import RateLimiter
+from tracing import span
+
+SCOPES = ['https://mail.google.com/']
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ----------------- GMAIL SERVICE -----------------
+class GmailService:
+    """One Gmail API client per process; the OAuth token is refreshed in place when it expires.
+
+    Set GMAIL_API_ENDPOINT (e.g. http://127.0.0.1:8025) to talk to a local fake Gmail
+    server instead; no OAuth is performed in that case.
+    """
+
+    def __init__(self, credentials_path=None, token_path=None, api_endpoint=None):
+        self.credentials_path = credentials_path or os.path.join(APP_DIR, 'credentials.json')
+        self.token_path = token_path or os.path.join(APP_DIR, "token.pickle")
+        self.api_endpoint = api_endpoint or os.getenv("GMAIL_API_ENDPOINT")
+        self.creds = None
+        self._service = None
+        self._lock = threading.RLock()
+
+    def _load_credentials(self):
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        creds = self.creds
+        if creds is None and os.path.exists(self.token_path):
+            with open(self.token_path, "rb") as token:
+                creds = pickle.load(token)
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, SCOPES)
+                creds = flow.run_local_server(port=8080)
+            with open(self.token_path, "wb") as token:
+                pickle.dump(creds, token)
+        return creds
+
+    def connect(self):
+        """Return the cached Gmail client, authenticating or refreshing the token only when needed."""
+        # The Google client libraries are imported on first use rather than when the app starts
+        from google.auth.credentials import AnonymousCredentials
+        from googleapiclient.discovery import build
+
+        with self._lock:
+            if self.api_endpoint:
+                if self._service is None:
+                    self._service = build('gmail', 'v1', credentials=AnonymousCredentials(),
+                                          client_options={"api_endpoint": self.api_endpoint})
+                return self._service
+            if self._service is None or not self.creds.valid:
+                self.creds = self._load_credentials()
+                self._service = build('gmail', 'v1', credentials=self.creds)
+            return self._service
+
+    def send_batch(self, raw_messages):
+        """Send base64url-encoded messages, several per HTTP request; returns a response or exception per message."""
+        with self._lock, span("gmail_send", messages=len(raw_messages)):
+            service = self.connect()
+            if len(raw_messages) == 1:
+                try:
+                    return [service.users().messages().send(userId="me", body={'raw': raw_messages[0]}).execute()]
+                except Exception as e:
+                    return [e]
+
+            from googleapiclient.http import BatchHttpRequest
+
+            results = [None] * len(raw_messages)
+
+            def collect(request_id, response, exception):
+                results[int(request_id)] = exception if exception is not None else response
+
+            root = (self.api_endpoint or "https://gmail.googleapis.com").rstrip("/")
+            batch = BatchHttpRequest(callback=collect, batch_uri=f"{root}/batch/gmail/v1")
+            for i, raw in enumerate(raw_messages):
+                batch.add(service.users().messages().send(userId="me", body={'raw': raw}), request_id=str(i))
+            batch.execute()
+            return results
+
+# ----------------- MESSAGE BUILDING -----------------
+def build_message(to_email, from_email, subject, body_text, parts=()):
+    if not parts:
+        message = MIMEText(body_text)
+    else:
+        message = MIMEMultipart()
+        # Attach body
+        message.attach(MIMEText(body_text, 'plain'))
+        for part in parts:
+            message.attach(part)
+
+    message['to'] = to_email
+    message['from'] = from_email
+    message['subject'] = subject
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+# ----------------- OUTBOX QUEUE -----------------
+class Outbox:
+    """SQLite-backed queue of outgoing messages, one idempotent record per message.
+
+    A message's id is a hash of its recipient, sender, subject, body and attachments, so
+    enqueueing the same message twice never sends it twice unless the caller asks to resend. Attachments are added to
+    `self.attachments` first and referenced by key, so a file shared by many messages is
+    encoded once.
+    """
+
+    def __init__(self, path=None, max_attempts=6, base_backoff=5.0, max_backoff=600.0, attachments=None):
+        self.path = path or os.path.join(CACHE_DIR, "outbox.sqlite")
+        self.attachments = attachments if attachments is not None else AttachmentStore()
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS messages (
+                   id TEXT PRIMARY KEY,
+                   to_email TEXT NOT NULL,
+                   subject TEXT,
+                   raw TEXT NOT NULL,
+                   status TEXT NOT NULL DEFAULT 'pending',
+                   attempts INTEGER NOT NULL DEFAULT 0,
+                   next_attempt REAL NOT NULL,
+                   last_error TEXT,
+                   gmail_id TEXT,
+                   created REAL NOT NULL,
+                   updated REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_due ON messages(status, next_attempt)")
+        # Messages claimed by a worker that died mid-send go back in the queue
+        self._conn.execute("UPDATE messages SET status = 'pending' WHERE status = 'sending'")
+        self._conn.commit()
+
+    def enqueue(self, to_email, from_email, subject, body_text, attachments=(), resend=False):
+        """Queue a message with the given attachment keys and return its id.
+
+        Re-queues the message if it previously failed for good. A message already sent is left
+        alone, unless `resend` is set (the user confirmed sending it again).
+        """
+        message_id = hash_key("message", to_email, from_email, subject, body_text, list(attachments))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM messages WHERE id = ?", (message_id,)).fetchone()
+            if row is None:
+                parts = [self.attachments.mime_part(key) for key in attachments]
+                raw = build_message(to_email, from_email, subject, body_text, parts)
+                self._conn.execute(
+                    "INSERT INTO messages (id, to_email, subject, raw, next_attempt, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (message_id, to_email, subject, raw, now, now, now),
+                )
+            elif row["status"] == "failed" or (resend and row["status"] == "sent"):
+                self._conn.execute(
+                    "UPDATE messages SET status = 'pending', attempts = 0, next_attempt = ?, updated = ? WHERE id = ?",
+                    (now, now, message_id),
+                )
+            self._conn.commit()
+        return message_id
+
+    def claim(self, limit):
+        """Mark up to `limit` due messages as sending and return them."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, raw, attempts FROM messages WHERE status = 'pending' AND next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE messages SET status = 'sending', updated = ? WHERE id = ?", [(now, row["id"]) for row in rows]
+            )
+            self._conn.commit()
+        return [dict(row) for row in rows]
+
+    def mark_sent(self, message_id, gmail_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE messages SET status = 'sent', gmail_id = ?, last_error = NULL, updated = ? WHERE id = ?",
+                (gmail_id, time.time(), message_id),
+            )
+            self._conn.commit()
+
+    def mark_failed(self, message_id, error, permanent=False):
+        """Record a failed attempt and schedule a retry with exponential backoff and jitter."""
+        now = time.time()
+        with self._lock:
+            attempts = self._conn.execute("SELECT attempts FROM messages WHERE id = ?", (message_id,)).fetchone()[0] + 1
+            if permanent or attempts >= self.max_attempts:
+                status, next_attempt = "failed", now
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+                status, next_attempt = "pending", now + delay * random.uniform(0.5, 1.5)
+            self._conn.execute(
+                "UPDATE messages SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, updated = ? WHERE id = ?",
+                (status, attempts, next_attempt, str(error)[:2000], now, message_id),
+            )
+            self._conn.commit()
+
+    def get(self, message_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, to_email, subject, status, attempts, next_attempt, last_error, gmail_id FROM messages WHERE id = ?",
+                (message_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def wait_for(self, message_id, timeout=30, interval=0.25):
+        """Poll until the message is sent or has failed for good, or `timeout` passes; returns its record."""
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get(message_id)
+            if record is None or record["status"] in ("sent", "failed") or time.monotonic() >= deadline:
+                return record
+            time.sleep(interval)
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+# ----------------- WORKER -----------------
+def is_permanent_error(error):
+    from googleapiclient.errors import HttpError
+
+    # Malformed requests won't succeed on retry; auth, quota and server errors might
+    return isinstance(error, HttpError) and error.resp.status in (400, 404)
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox in rate-limited batches."""
+
+    def __init__(self, outbox, gmail, batch_size=10, sends_per_second=2.0, poll_interval=5.0):
+        super().__init__(daemon=True, name="gmail-outbox")
+        self.outbox = outbox
+        self.gmail = gmail
+        self.batch_size = batch_size
+        # messages.send costs 100 of the 250 quota units Gmail allows per user per second
+        self.limiter = RateLimiter(sends_per_second, burst=batch_size)
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        # Not `_stop`: threading.Thread uses that name internally for is_alive() and join()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def process_once(self):
+        rows = self.outbox.claim(self.batch_size)
+        if not rows:
+            return 0
+        self.limiter.acquire(len(rows))
+        try:
+            results = self.gmail.send_batch([row["raw"] for row in rows])
+        except Exception as e:
+            results = [e] * len(rows)
+        for row, result in zip(rows, results):
+            if isinstance(result, Exception):
+                self.outbox.mark_failed(row["id"], result, permanent=is_permanent_error(result))
+            else:
+                self.outbox.mark_sent(row["id"], (result or {}).get("id"))
+        return len(rows)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                if self.process_once():
+                    continue
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
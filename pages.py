@@ -0,0 +1,135 @@
+import os
+import time
+import hashlib
+import threading
+import requests
+from cache import CACHE_DIR, DiskCache
+from clients import get_session
+from tracing import span
+from utils import extract_page_text
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+# Bump when extract_page_text changes so cached extractions are redone
+EXTRACTOR_VERSION = 1
+
+# ----------------- FETCH CACHE -----------------
+class PageCache:
+    """Job pages cached on disk with their validators and their extracted text.
+
+    A page fetched less than `fresh_for` seconds ago is served without any request.
+    Older pages are revalidated with If-None-Match / If-Modified-Since, and a 304 reuses
+    both the stored HTML and its extraction. If revalidation fails on a network error,
+    the stored copy is served. Entries are evicted least recently used first, beyond
+    `max_entries` pages or `max_bytes` of stored data.
+    """
+
+    def __init__(self, cache=None, fresh_for=300, max_entries=2000, max_bytes=256 * 1024 * 1024):
+        self.cache = cache if cache is not None else DiskCache(
+            os.path.join(CACHE_DIR, "pages.sqlite"), max_entries=max_entries, max_bytes=max_bytes,
+            enabled=os.getenv("PAGE_CACHE", "on").lower() not in ("off", "0", "false"),
+        )
+        self.fresh_for = fresh_for
+        self.counts = {"fresh": 0, "revalidated": 0, "changed": 0, "misses": 0, "stale": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def fetch(self, url, timeout=20):
+        """Return the cache entry for `url` ({"html", "etag", "last_modified", ...}), fetching or revalidating as needed."""
+        entry, updated = self._fetch(url, timeout)
+        if updated:
+            self.cache.set(f"page:{url}", entry)
+        return entry
+
+    def _fetch(self, url, timeout):
+        """(entry, whether it needs saving)."""
+        entry = self.cache.get(f"page:{url}")
+        with span("fetch", url=url) as current:
+            if entry is not None and time.time() - entry["fetched"] < self.fresh_for:
+                current.set(cache="fresh")
+                self._count("fresh")
+                return entry, False
+
+            headers = dict(HEADERS)
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+            try:
+                resp = get_session().get(url, headers=headers, timeout=timeout)
+            except requests.RequestException:
+                if entry is None:
+                    raise
+                current.set(cache="stale")
+                self._count("stale")
+                return entry, False
+            current.set(status_code=resp.status_code, bytes=len(resp.content))
+
+            if resp.status_code == 304 and entry is not None:
+                outcome = "revalidated"
+                entry["fetched"] = time.time()
+            else:
+                resp.raise_for_status()
+                digest = hashlib.sha256(resp.content).hexdigest()
+                unchanged = entry is not None and entry.get("sha256") == digest
+                # Servers without validators still send identical bytes for an unchanged page
+                outcome = "revalidated" if unchanged else ("changed" if entry is not None else "misses")
+                entry = {
+                    "url": url,
+                    "html": resp.text,
+                    "sha256": digest,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "fetched": time.time(),
+                    "page": entry.get("page") if unchanged else None,
+                }
+            current.set(cache=outcome)
+            self._count(outcome)
+            return entry, True
+
+    def load(self, url, timeout=20):
+        """Extracted page text for `url`, reusing the stored extraction while the page is unchanged."""
+        entry, updated = self._fetch(url, timeout)
+        page = entry.get("page")
+        if page is None or page.get("version") != EXTRACTOR_VERSION:
+            with span("extract_text") as current:
+                page = {**extract_page_text(entry["html"]), "version": EXTRACTOR_VERSION}
+                current.set(tokens_before=page["tokens_before"], tokens_after=page["tokens_after"])
+            entry["page"], updated = page, True
+        if updated:
+            self.cache.set(f"page:{url}", entry)
+        return {k: v for k, v in page.items() if k != "version"}
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = sum(counts.values())
+        store = self.cache.stats()
+        return {
+            **counts,
+            "hit_rate": (counts["fresh"] + counts["revalidated"]) / lookups if lookups else 0.0,
+            "entries": store["entries"],
+            "evictions": store["evictions"],
+        }
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+def get_page_cache():
+    """Process-wide page cache. Set PAGE_CACHE=off to always download."""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache(fresh_for=float(os.getenv("PAGE_CACHE_FRESH_SECONDS", "300")))
+    return _page_cache
+
+# ----------------- PAGE LOADING -----------------
+def load_page(url, timeout=20):
+    """Fetch a job page and return its extracted main text plus before/after token counts."""
+    return get_page_cache().load(url, timeout=timeout)
@@ -0,0 +1,329 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from checkpoints import code_version
+from ledger import resume_key
+from pages import load_page
+from resume import format_profile
+from routing import validate_job
+from tracing import current_span, span, wrap
+
+# ----------------- STAGE GRAPH -----------------
+class StageGraph:
+    """Named stages with dependencies; each stage runs as soon as the stages it depends on finish.
+
+    A stage function receives the results of its dependencies as positional arguments,
+    in the order the dependencies were declared. A stage added with a `version` (see
+    checkpoints.code_version) is checkpointed when the run has a CheckpointStore: its output
+    is stored under its name, version and inputs, and restored instead of recomputed when
+    they all match. Only give a version to stages whose output depends on nothing else.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.versions = {}
+
+    def add(self, name, fn, deps=(), version=None):
+        self.stages[name] = (fn, tuple(deps))
+        if version is not None:
+            self.versions[name] = version
+        return self
+
+    def start(self, max_workers=4, checkpoints=None):
+        return PipelineRun(self.stages, max_workers, self.versions, checkpoints)
+
+    def run(self, max_workers=4, checkpoints=None):
+        return self.start(max_workers, checkpoints).wait()
+
+
+class PipelineRun:
+    def __init__(self, stages, max_workers, versions=None, checkpoints=None):
+        for name, (_, deps) in stages.items():
+            missing = [d for d in deps if d not in stages]
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self.stages = stages
+        self.futures = {name: Future() for name in stages}
+        self.timings = {}
+        self.versions = versions or {}
+        self.checkpoints = checkpoints
+        # Stages whose output came from a checkpoint rather than being computed
+        self.restored = set()
+        self._lock = threading.Lock()
+        self._pending = set(stages)
+        self._scheduled = set()
+        self._check_acyclic()
+        self._dependents = {name: [] for name in stages}
+        for name, (_, deps) in stages.items():
+            for dep in deps:
+                self._dependents[dep].append(name)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Stages run in worker threads but belong to the trace that started the run
+        self._run_in_context = wrap(self._run_stage)
+
+        for name, (_, deps) in stages.items():
+            if not deps:
+                self._submit(name)
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name][1]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _submit(self, name):
+        fn, deps = self.stages[name]
+        args = [self.futures[d].result() for d in deps]
+        self._executor.submit(self._run_in_context, name, fn, args)
+
+    def _run_stage(self, name, fn, args):
+        started = time.monotonic()
+        try:
+            with span(f"stage.{name}"):
+                result = self._compute(name, fn, args)
+        except BaseException as e:
+            self.timings[name] = time.monotonic() - started
+            self._finish(name, error=e)
+        else:
+            self.timings[name] = time.monotonic() - started
+            self._finish(name, result=result)
+
+    def _compute(self, name, fn, args):
+        version = self.versions.get(name)
+        if self.checkpoints is None or version is None:
+            return fn(*args)
+        key = self.checkpoints.key(name, version, args)
+        restored, result = self.checkpoints.load(key)
+        if restored:
+            self.restored.add(name)
+        else:
+            result = fn(*args)
+            self.checkpoints.save(key, result)
+        self.checkpoints.count(restored)
+        return result
+
+    def _finish(self, name, result=None, error=None):
+        if error is None:
+            self.futures[name].set_result(result)
+        else:
+            self.futures[name].set_exception(error)
+
+        ready = []
+        with self._lock:
+            self._pending.discard(name)
+            for dependent in self._dependents[name]:
+                if dependent in self._scheduled:
+                    continue
+                dep_futures = [self.futures[d] for d in self.stages[dependent][1]]
+                failed = next((f.exception() for f in dep_futures if f.done() and f.exception()), None)
+                if failed is not None or all(f.done() for f in dep_futures):
+                    self._scheduled.add(dependent)
+                    ready.append((dependent, failed))
+            if not self._pending:
+                self._executor.shutdown(wait=False)
+
+        for dependent, failed in ready:
+            if failed is not None:
+                # A failed dependency fails everything downstream of it
+                self._finish(dependent, error=failed)
+            else:
+                self._submit(dependent)
+
+    def result(self, name, timeout=None):
+        """Block until `name` finishes and return its result (or raise its error)."""
+        return self.futures[name].result(timeout=timeout)
+
+    def wait(self):
+        """Wait for every stage, then return all results (raising the first error, if any)."""
+        wait(self.futures.values())
+        return {name: future.result() for name, future in self.futures.items()}
+
+# ----------------- INDIVIDUAL PIPELINE -----------------
+# Inputs of the checkpointed generation stages, in the order the stage graph passes them.
+# checkpoint_key lays its keys out from the same tuples, so code that writes a letter or
+# email outside the graph (the app streams them) restores and stores the same checkpoints.
+STAGE_INPUTS = {
+    "cover_letter": ("job", "resume", "previous"),
+    "cold_email": ("job", "applicant", "cover_letter", "previous"),
+}
+
+def individual_pipeline(chain, job_url, read_resume, generate=True, limits=None, ledger=None):
+    """Stage graph for one job: page → job info → recruiter email, resume → applicant info,
+    and (when `generate` is set) job + resume → cover letter → cold email.
+
+    `read_resume` is a zero-argument callable returning a parsed resume ({"text", "profile"},
+    see resume.ResumeParser). `limits` optionally maps "fetch" to a RateLimiter. Model calls are
+    limited by `chain.limiter` and Hunter.io calls by the chain's HunterClient, so every request
+    is paced, cascade escalations included.
+
+    Extraction, the recruiter lookup, the cover letter and the cold email carry versions from
+    `stage_versions`, so a run started with a CheckpointStore restores them when their inputs are
+    unchanged: a new resume recomputes only the letter and email.
+
+    With a `ledger` (see ledger.Ledger), the extracted job is looked up in it ("duplicate") and,
+    if the same or a near-identical posting was already written up from the same resume, the
+    stored letter and email are reused ("previous") instead of generated again. Generated
+    results are recorded ("ledger") for next time.
+    """
+    limits = limits or {}
+    versions = stage_versions(chain)
+
+    def limited(kind, fn):
+        limiter = limits.get(kind)
+        if limiter is None:
+            return fn
+
+        def wrapper(*args):
+            with limiter:
+                return fn(*args)
+        return wrapper
+
+    def applicant_info(resume):
+        # Contacts were already pulled out when the resume was parsed
+        profile = resume["profile"]
+        return {key: profile[key] for key in ("name", "email", "phone", "linkedin")}
+
+    graph = StageGraph()
+    graph.add("page", limited("fetch", lambda: load_page(job_url)))
+    graph.add("job", lambda page: chain.extract_job_info(page["text"]), deps=["page"],
+              version=versions["job"])
+    graph.add("resume", read_resume)
+    graph.add("applicant", applicant_info, deps=["resume"])
+    graph.add("recruiter_email", lambda job, page: chain.resolve_recruiter_email(job, page["text"]), deps=["job", "page"],
+              version=versions["recruiter_email"])
+    if ledger is not None:
+        graph.add("duplicate", ledger.find, deps=["job"])
+        graph.add("previous", reusable_result, deps=["duplicate", "resume"])
+    else:
+        # Without a ledger there is never a previous result to reuse
+        graph.add("previous", lambda: None)
+    if generate:
+        def cover_letter(job, resume, previous=None):
+            if previous:
+                current_span().set(reused=True)
+                return previous["cover_letter"]
+            return chain.generate_cover_letter(job, resume["profile"])
+
+        def cold_email(job, applicant, letter, previous=None):
+            if previous:
+                current_span().set(reused=True)
+                return previous["cold_email"]
+            # generate_cold_email updates the applicant name in place, so give it a copy
+            return chain.generate_cold_email(job, dict(applicant), letter)
+
+        graph.add("cover_letter", cover_letter, deps=STAGE_INPUTS["cover_letter"], version=versions["cover_letter"])
+        graph.add("cold_email", cold_email, deps=STAGE_INPUTS["cold_email"], version=versions["cold_email"])
+        if ledger is not None:
+            graph.add(
+                "ledger",
+                lambda job, resume, letter, email, duplicate, previous: duplicate["id"] if previous else ledger.record(
+                    job, url=job_url, result=generated_result(resume, letter, email)),
+                deps=["job", "resume", "cover_letter", "cold_email", "duplicate", "previous"],
+            )
+    return graph
+
+def stage_versions(chain):
+    """Code/prompt versions of the individual pipeline's checkpointed stages for an IndividualChain."""
+    model = (getattr(chain.client, "model_name", ""), getattr(chain.client, "temperature", ""))
+    return {
+        "job": code_version(chain.extract_job_info, validate_job, *chain.cascade.policies["job_info"].models),
+        "recruiter_email": code_version(chain.resolve_recruiter_email),
+        "cover_letter": code_version(chain.generate_cover_letter, chain._cover_letter_prompt, format_profile, *model),
+        "cold_email": code_version(chain.generate_cold_email, chain._cold_email_prompt, chain.finalize_cold_email, *model),
+    }
+
+def checkpoint_key(checkpoints, chain, stage, **inputs):
+    """Key individual_pipeline checkpoints `stage` under for these inputs, given by dependency name (missing ones are None)."""
+    return checkpoints.key(stage, stage_versions(chain)[stage], [inputs.get(name) for name in STAGE_INPUTS[stage]])
+
+def organization_versions(chain):
+    """Code/prompt versions of the organization path's checkpointed steps for a Chain."""
+    return {
+        "jobs": code_version(chain.extract_jobs, chain._extract_window, *chain.cascade.policies["jobs"].models),
+        "outreach_email": code_version(chain.write_mail, chain._mail_prompt, getattr(chain.llm, "model_name", "")),
+    }
+
+def generated_result(resume, cover_letter, cold_email):
+    """What the ledger keeps for a posting written up from `resume`."""
+    return {"resume": resume_key(resume), "cover_letter": cover_letter, "cold_email": cold_email}
+
+def reusable_result(duplicate, resume):
+    """The stored letter and email of a duplicate posting, if they were written from this same resume."""
+    result = (duplicate or {}).get("result", {})
+    if result.get("resume") == resume_key(resume) and result.get("cover_letter") and result.get("cold_email"):
+        return result
+    return None
+
+# ----------------- ORGANIZATION OUTREACH -----------------
+def organization_outreach(chain, portfolio, hunter, jobs, max_workers=8, ledger=None, checkpoints=None, on_text=None):
+    """Write an outreach email for every job concurrently; yields (index, result) as each job finishes.
+
+    Each result holds the job, its portfolio links, the email (or an error) and the recruiter
+    email found via Hunter.io. Hunter lookups run alongside the emails, and repeated companies
+    are only searched once (see HunterClient). Model calls are paced by `chain.limiter`.
+    With a `ledger`, postings already written up reuse their stored email ("duplicate" holds
+    the match) and new emails are recorded ("posting_id"). With `checkpoints` (a CheckpointStore),
+    an email is only written again when its job, its links or the mail prompt changed.
+    With `on_text`, new emails are streamed and `on_text(index, text_so_far)` is called from
+    the worker thread as each one grows. Closing the generator early cancels the emails not yet started.
+    """
+    mail_version = organization_versions(chain)["outreach_email"]
+
+    def write_mail(i, job, links):
+        if on_text is None:
+            return chain.write_mail(job, links)
+        text = ""
+        for chunk in chain.stream_mail(job, links):
+            text += chunk
+            on_text(i, text)
+        return text.strip()
+
+    def write(i, job):
+        with span("outreach_job", role=job.get("role") or "") as current:
+            duplicate = ledger.find(job) if ledger is not None else None
+            if duplicate and duplicate["result"].get("outreach_email"):
+                current.set(reused=True)
+                stored = duplicate["result"]
+                return stored.get("links", []), stored["outreach_email"], duplicate, duplicate["id"]
+            links = portfolio.query_links(job.get("skills", []))
+            if checkpoints is not None:
+                email = checkpoints.cached("outreach_email", mail_version, [job, links], lambda: write_mail(i, job, links))
+            else:
+                email = write_mail(i, job, links)
+            posting_id = ledger.record(job, result={"links": links, "outreach_email": email}) if ledger is not None else None
+            return links, email, None, posting_id
+
+    def recruiter_email(job):
+        name = job.get("recruiter_name") or ""
+        company = job.get("company_name") or job.get("company name") or ""
+        return hunter.find_email(name, company) if name and company else ""
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Hunter calls are quick; queue them first so they never wait behind the LLM calls
+        lookups = [pool.submit(wrap(recruiter_email), job) for job in jobs]
+        mails = {pool.submit(wrap(write), i, job): i for i, job in enumerate(jobs)}
+        try:
+            for future in as_completed(mails):
+                i = mails[future]
+                result = {"job": jobs[i], "links": [], "email": "", "error": None, "duplicate": None, "posting_id": None}
+                try:
+                    result["links"], result["email"], result["duplicate"], result["posting_id"] = future.result()
+                except Exception as e:
+                    result["error"] = str(e)
+                result["recruiter_email"] = lookups[i].result()
+                yield i, result
+        finally:
+            # A consumer that stops early (a cancelled job) shouldn't wait for emails nobody will read
+            for future in [*lookups, *mails]:
+                future.cancel()
@@ -1,30 +1,132 @@
-import pandas as pd
-import chromadb
-import uuid
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from tracing import span
+
+# Reciprocal rank fusion constant; dampens the weight of any single skill's top hit
+RRF_K = 60
 
 class Portfolio:
-    def __init__(self, file_path="/Users/juhianand/Documents/UIC/Spring/DeepLearning/Cold_Email_Project/app/resource/my_portfolio.csv"):
+    def __init__(self, file_path="/Users/juhianand/Documents/UIC/Spring/DeepLearning/Cold_Email_Project/app/resource/my_portfolio.csv", batch_size=5000, embedding_function=None, embedding_cache_size=10000):
+        # pandas and chromadb take over a second to import, so only pages that use the portfolio pay for them
+        import pandas as pd
+        import chromadb
+        from chromadb.utils import embedding_functions
+
         self.file_path = file_path
         self.data = pd.read_csv(file_path)
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
         self.chroma_client = chromadb.PersistentClient('vectorstore')
-        self.collection = self.chroma_client.get_or_create_collection(name="portfolio")
+        self.collection = self.chroma_client.get_or_create_collection(
+            name="portfolio", embedding_function=self.embedding_function
+        )
+        self.embedding_cache = OrderedDict()
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_lock = threading.Lock()
+        max_batch = getattr(self.chroma_client, "get_max_batch_size", lambda: batch_size)()
+        self.batch_size = min(batch_size, max_batch)
+
+    @staticmethod
+    def row_id(techstack, links):
+        """Stable id derived from the row's content, so unchanged rows keep their id across syncs."""
+        return hashlib.sha1(f"{techstack}\x1f{links}".encode("utf-8")).hexdigest()
+
+    def csv_hash(self):
+        digest = hashlib.sha256()
+        with open(self.file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
 
     def load_portfolio(self):
-        if not self.collection.count():
-            for _, row in self.data.iterrows():
-                self.collection.add(
-                    documents=row["Techstack"],
-                    metadatas={"links": row["Links"]},
-                    ids=[str(uuid.uuid4())]
-                )
-
-    def query_links(self, skills):
-        """Return top 2 matching portfolio links for the extracted skills."""
-        if not skills:
+        """Sync the collection with the CSV: embed new or changed rows in batches and drop removed rows.
+
+        Nothing is read from the collection when the CSV is byte-for-byte unchanged since the last sync.
+        """
+        csv_hash = self.csv_hash()
+        if (self.collection.metadata or {}).get("csv_hash") == csv_hash:
+            return
+
+        rows = {}
+        for techstack, links in zip(self.data["Techstack"].astype(str), self.data["Links"].astype(str)):
+            rows.setdefault(self.row_id(techstack, links), (techstack, links))
+
+        existing = set(self.collection.get(include=[])["ids"])
+        new_ids = [row_id for row_id in rows if row_id not in existing]
+        stale_ids = list(existing - rows.keys())
+
+        for start in range(0, len(new_ids), self.batch_size):
+            batch = new_ids[start:start + self.batch_size]
+            self.collection.upsert(
+                ids=batch,
+                documents=[rows[row_id][0] for row_id in batch],
+                metadatas=[{"links": rows[row_id][1]} for row_id in batch],
+            )
+        for start in range(0, len(stale_ids), self.batch_size):
+            self.collection.delete(ids=stale_ids[start:start + self.batch_size])
+
+        self.collection.modify(metadata={"csv_hash": csv_hash})
+
+    @staticmethod
+    def normalize_skills(skills):
+        """Accept a list of skills or a comma/semicolon separated string; drop blanks and repeats."""
+        if isinstance(skills, str):
+            skills = re.split(r"[,;\n]", skills)
+        seen = {}
+        for skill in skills or []:
+            skill = " ".join(str(skill).split())
+            if skill and skill.lower() not in seen:
+                seen[skill.lower()] = skill
+        return list(seen.values())
+
+    def embed_skills(self, skills):
+        """Embeddings for `skills`, calling the embedding model only for strings not seen before."""
+        with self._embedding_lock:
+            found = {skill.lower(): self.embedding_cache.get(skill.lower()) for skill in skills}
+        missing = [skill for skill in skills if found[skill.lower()] is None]
+        if missing:
+            for skill, embedding in zip(missing, self.embedding_function(missing)):
+                found[skill.lower()] = embedding
+        with self._embedding_lock:
+            for key, embedding in found.items():
+                self.embedding_cache[key] = embedding
+                self.embedding_cache.move_to_end(key)
+            while len(self.embedding_cache) > self.embedding_cache_size:
+                self.embedding_cache.popitem(last=False)
+        return [found[skill.lower()] for skill in skills]
+
+    def rank_links(self, skills, k=3, per_skill=5):
+        """Top-k portfolio links for all skills combined, as dicts with link, score and best distance.
+
+        Hits from every skill are merged by reciprocal rank fusion, so a link that matches
+        several skills outranks one that is a close match for a single skill.
+        """
+        skills = self.normalize_skills(skills)
+        count = self.collection.count()
+        if not skills or not count:
             return []
+        with span("vector_query", skills=len(skills), collection_size=count):
+            results = self.collection.query(
+                query_embeddings=self.embed_skills(skills),
+                n_results=min(per_skill, count),
+                include=["metadatas", "distances"],
+            )
+        ranked = {}
+        for metadatas, distances in zip(results["metadatas"], results["distances"]):
+            for rank, (metadata, distance) in enumerate(zip(metadatas, distances)):
+                link = (metadata or {}).get("links")
+                if not link:
+                    continue
+                entry = ranked.setdefault(link, {"link": link, "score": 0.0, "distance": distance})
+                entry["score"] += 1.0 / (RRF_K + rank + 1)
+                entry["distance"] = min(entry["distance"], distance)
+        return sorted(ranked.values(), key=lambda e: (-e["score"], e["distance"]))[:k]
+
+    def query_links(self, skills, k=3):
+        """Return the top-k deduplicated portfolio links for the extracted skills."""
         try:
-            results = self.collection.query(query_texts=skills, n_results=2)
-            return results.get('metadatas', [])
+            return [entry["link"] for entry in self.rank_links(skills, k=k)]
         except Exception as e:
             print(f"Portfolio query error: {e}")
             return []
@@ -0,0 +1,180 @@
+# ================== resume.py (Resume Parsing) ==================
+import os
+import re
+import hashlib
+import threading
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cache import CACHE_DIR, DiskCache
+from tracing import span
+
+# Below this many pages, starting worker processes costs more than it saves
+PARALLEL_MIN_PAGES = 8
+PAGES_PER_TASK = 4
+
+SECTION_HEADERS = re.compile(
+    r"^(summary|profile|professional summary|objective|(work |professional |relevant )?experience|employment( history)?|"
+    r"work history|projects|academic projects|education|(technical |core )?skills|technologies|tech stack|"
+    r"core competencies|certifications?|awards|honors|publications|leadership|activities|interests|languages|volunteer(ing)?)\s*:?$",
+    re.I,
+)
+SKILL_SECTIONS = re.compile(r"skills|technologies|tech stack|competencies", re.I)
+EXPERIENCE_SECTIONS = re.compile(r"experience|employment|work history|projects", re.I)
+# pdfplumber renders some bullet glyphs as "(cid:NNN)"
+BULLET = re.compile(r"^(\(cid:\d+\)|[•▪●◦–\-\*➢‣>])\s*")
+
+# ----------------- TEXT EXTRACTION -----------------
+def _extract_pdf_pages(data, start, stop):
+    import pdfplumber
+
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the app process is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 2, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def file_kind(file_type):
+    """Map a MIME type or file extension to "pdf", "docx" or "text"."""
+    file_type = (file_type or "").lower()
+    if file_type.endswith("pdf"):
+        return "pdf"
+    if file_type.endswith(("docx", "doc", "msword", "wordprocessingml.document")):
+        return "docx"
+    return "text"
+
+def extract_resume_text(data, file_type):
+    kind = file_kind(file_type)
+    # Parsers are imported for the file type at hand, not when the app starts
+    if kind == "pdf":
+        import pdfplumber
+
+        with pdfplumber.open(BytesIO(data)) as pdf:
+            page_count = len(pdf.pages)
+            if page_count < PARALLEL_MIN_PAGES:
+                return "\n".join(page.extract_text() or "" for page in pdf.pages)
+        ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+        try:
+            chunks = list(_get_pool().map(_extract_pdf_pages, [data] * len(ranges), *zip(*ranges)))
+        except BrokenProcessPool:
+            chunks = [_extract_pdf_pages(data, 0, page_count)]
+        return "\n".join(text for chunk in chunks for text in chunk)
+    if kind == "docx":
+        from docx import Document
+
+        return "\n".join(para.text for para in Document(BytesIO(data)).paragraphs)
+    return data.decode("utf-8", errors="replace")
+
+# ----------------- APPLICANT PROFILE -----------------
+def extract_contact_info(text):
+    email_match = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", text)
+    phone_match = re.search(r"(\+?\d{1,3})?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}", text)
+    linkedin_match = re.search(r"(https?://)?(www\.)?(linkedin\.com/in/[a-zA-Z0-9-_/]+)", text)
+
+    return {
+        "email": email_match.group(0) if email_match else "youremail@example.com",
+        "phone": phone_match.group(0).strip() if phone_match else "(123) 456-7890",
+        "linkedin": linkedin_match.group(0) if linkedin_match else "https://linkedin.com/in/yourname",
+        "name": "Your Name"
+    }
+
+def _sections(lines):
+    """Group lines under the most recent section header; lines before any header go under ""."""
+    sections, current = {"": []}, ""
+    for line in lines:
+        if len(line) <= 40 and SECTION_HEADERS.match(line):
+            current = line.rstrip(":").strip().lower()
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line)
+    return sections
+
+def build_profile(text, max_skills=40, max_bullets=12):
+    """Compact applicant profile: name, contacts, skills and experience bullets."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    profile = extract_contact_info(text)
+
+    # Name heuristic: first line of 2-4 alphabetic words
+    for line in lines[:5]:
+        words = line.replace(".", "").split()
+        if 2 <= len(words) <= 4 and all(word.isalpha() for word in words):
+            profile["name"] = line
+            break
+
+    sections = _sections(lines)
+    skills = []
+    for header, body in sections.items():
+        if header and SKILL_SECTIONS.search(header):
+            for line in body:
+                line = BULLET.sub("", line)
+                # "Languages: Python, Go" → "Python, Go"
+                line = line.split(":", 1)[1] if ":" in line[:30] else line
+                skills += [s.strip(" .") for s in re.split(r"[,;|•/]", line) if 1 < len(s.strip(" .")) <= 40]
+    profile["skills"] = list(dict.fromkeys(skills))[:max_skills]
+
+    bullets = []
+    for header, body in sections.items():
+        if header and EXPERIENCE_SECTIONS.search(header):
+            marked = [BULLET.sub("", line) for line in body if BULLET.match(line)]
+            # Fall back to long lines when the PDF lost its bullet glyphs
+            bullets += marked or [line for line in body if len(line) > 60]
+    profile["experience"] = [b[:220] for b in list(dict.fromkeys(bullets))[:max_bullets]]
+
+    if not profile["skills"] and not profile["experience"]:
+        # Unrecognised layout: keep a bounded slice of the text so the letter still has substance
+        profile["summary"] = " ".join(lines)[:1500]
+    return profile
+
+def format_profile(profile):
+    """Render a profile as the short applicant block used in cover-letter prompts."""
+    parts = [f"Name: {profile.get('name')}", f"Contact: {profile.get('email')} | {profile.get('phone')} | {profile.get('linkedin')}"]
+    if profile.get("skills"):
+        parts.append("Skills: " + ", ".join(profile["skills"]))
+    if profile.get("experience"):
+        parts.append("Experience highlights:\n" + "\n".join(f"- {b}" for b in profile["experience"]))
+    if profile.get("summary"):
+        parts.append("Background: " + profile["summary"])
+    return "\n".join(parts)
+
+# ----------------- CACHED PARSER -----------------
+class ResumeParser:
+    """Parses each distinct resume file once; results are cached by file hash in memory and on disk."""
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else DiskCache(os.path.join(CACHE_DIR, "resumes.sqlite"), max_entries=1000)
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def parse(self, data, file_type):
+        """Return {"text": ..., "profile": ...} for the resume bytes."""
+        key = hashlib.sha256(data).hexdigest()
+        with span("resume_parse", file_type=file_kind(file_type), bytes=len(data)) as current:
+            with self._lock:
+                if key in self._memory:
+                    current.set(cache_hit="memory")
+                    return self._memory[key]
+            parsed = self.cache.get(key)
+            current.set(cache_hit="disk" if parsed is not None else False)
+            if parsed is None:
+                text = extract_resume_text(data, file_type)
+                parsed = {"text": text, "profile": build_profile(text)}
+                self.cache.set(key, parsed)
+            with self._lock:
+                self._memory[key] = parsed
+                if len(self._memory) > 256:
+                    self._memory.pop(next(iter(self._memory)))
+            return parsed
+
+    def parse_file(self, path):
+        with open(path, "rb") as f:
+            return self.parse(f.read(), os.path.splitext(path)[1])
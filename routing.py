@@ -0,0 +1,133 @@
+# ================== routing.py (Model Cascade) ==================
+import os
+import re
+import threading
+from clients import get_groq
+from tracing import span
+from utils import estimate_tokens
+
+SMALL_MODEL = "llama3-8b-8192"
+LARGE_MODEL = "llama3-70b-8192"
+SNAKE_CASE = re.compile(r"^[a-z][a-z0-9_]*$")
+
+# ----------------- SCHEMA VALIDATION -----------------
+class ValidationError(ValueError):
+    pass
+
+def validate_job(job, required=("role",)):
+    """Raise ValidationError unless `job` is a posting dict with snake_case keys and the required fields."""
+    if not isinstance(job, dict):
+        raise ValidationError(f"Expected a JSON object, got {type(job).__name__}")
+    bad_keys = [key for key in job if not SNAKE_CASE.match(str(key))]
+    if bad_keys:
+        raise ValidationError(f"Keys are not snake_case: {', '.join(map(str, bad_keys))}")
+    missing = [key for key in required if not job.get(key)]
+    if missing:
+        raise ValidationError(f"Missing required field(s): {', '.join(missing)}")
+    if not isinstance(job.get("skills", []), (list, str)):
+        raise ValidationError("skills must be a list or a string")
+    return job
+
+def validate_jobs(jobs):
+    if not isinstance(jobs, list):
+        raise ValidationError(f"Expected a JSON list, got {type(jobs).__name__}")
+    for job in jobs:
+        validate_job(job)
+    return jobs
+
+# ----------------- POLICIES -----------------
+class RoutePolicy:
+    """Models to try in order, cheapest first, for one kind of request.
+
+    Prompts estimated above `max_prompt_tokens` skip straight to the last model, and
+    `escalate_on_empty` treats an empty result as a failure worth a second opinion.
+    """
+
+    def __init__(self, models=(SMALL_MODEL, LARGE_MODEL), max_prompt_tokens=6000, escalate_on_empty=False):
+        self.models = tuple(models)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.escalate_on_empty = escalate_on_empty
+
+DEFAULT_POLICIES = {
+    "job_info": RoutePolicy(),
+    # A careers page rarely has no openings; an empty list from the small model is more likely a miss
+    "jobs": RoutePolicy(escalate_on_empty=True),
+}
+
+# ----------------- CASCADE -----------------
+class ModelCascade:
+    """Tries the small model first and escalates to the next model only when its output fails to parse or validate.
+
+    `invoke(llm, prompt)` returns the response text (chains.invoke_llm with a cache bound in);
+    `llm_factory(model_name, temperature)` builds the client for a model. Set MODEL_CASCADE=off
+    to always use the last (largest) model of each route.
+    """
+
+    def __init__(self, invoke, llm_factory=get_groq, policies=None, temperature=0, enabled=None):
+        self.invoke = invoke
+        self.llm_factory = llm_factory
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.temperature = temperature
+        self.enabled = enabled if enabled is not None else os.getenv("MODEL_CASCADE", "on").lower() not in ("off", "0", "false")
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _record(self, route, model, escalations, ok):
+        with self._lock:
+            stats = self._stats.setdefault(route, {"calls": 0, "escalations": 0, "failures": 0, "served_by": {}})
+            stats["calls"] += 1
+            stats["escalations"] += escalations
+            stats["failures"] += not ok
+            if ok:
+                stats["served_by"][model] = stats["served_by"].get(model, 0) + 1
+
+    def run(self, route, prompt, parse, validate=None, escalate_on_empty=None, first=0):
+        """Return `parse(text)` from the first model in the route's policy whose output passes `validate`.
+
+        `parse` raises ValueError (e.g. OutputParserException) on unusable output and `validate`
+        raises ValidationError. The last model's parse error is re-raised; its output is returned
+        even if it fails validation, since there is no one left to ask.
+        `escalate_on_empty` overrides the policy's, for callers that judge emptiness over several
+        calls, and `first` starts at that model of the route to escalate such a call afterwards.
+        """
+        policy = self.policies[route]
+        models = policy.models
+        if not self.enabled or (policy.max_prompt_tokens and estimate_tokens(prompt) > policy.max_prompt_tokens):
+            first = len(models) - 1
+        first = min(first, len(models) - 1)
+        if escalate_on_empty is None:
+            escalate_on_empty = policy.escalate_on_empty
+
+        with span("cascade", route=route) as current:
+            for attempt, model in enumerate(models[first:], first):
+                last = attempt == len(models) - 1
+                try:
+                    result = parse(self.invoke(self.llm_factory(model, temperature=self.temperature), prompt))
+                    if validate is not None:
+                        validate(result)
+                    if escalate_on_empty and not result:
+                        raise ValidationError("Empty result")
+                except ValidationError as e:
+                    if not last:
+                        current.set(**{f"escalation_{attempt + 1}": f"{model}: {e}"[:200]})
+                        continue
+                    current.set(validation_error=str(e)[:200])
+                except ValueError as e:
+                    if not last:
+                        current.set(**{f"escalation_{attempt + 1}": f"{model}: {e}"[:200]})
+                        continue
+                    current.set(model=model, escalations=attempt)
+                    self._record(route, model, attempt, ok=False)
+                    raise
+                current.set(model=model, escalations=attempt)
+                self._record(route, model, attempt, ok=True)
+                return result
+
+    def stats(self):
+        """Per route: calls, escalations, failures, how many were served by each model, and the escalation rate."""
+        with self._lock:
+            return {
+                route: {**stats, "served_by": dict(stats["served_by"]),
+                        "escalation_rate": round(stats["escalations"] / stats["calls"], 3) if stats["calls"] else 0.0}
+                for route, stats in self._stats.items()
+            }
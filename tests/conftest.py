@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Modules read CACHE_DIR when imported; keep the tests' caches out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="cold-email-tests-"))
+os.environ.setdefault("TRACING", "off")
+# ChatGroq clients are built (never called) when chains are constructed
+os.environ.setdefault("GROQ_API_KEY", "test")
@@ -0,0 +1,43 @@
+import json
+import sqlite3
+from cache import DiskCache
+
+def stored_bytes(cache):
+    return sum(len(value.encode("utf-8")) for (value,) in cache._conn.execute("SELECT value FROM entries"))
+
+def test_byte_total_tracks_inserts_replaces_and_deletes(tmp_path):
+    cache = DiskCache(str(tmp_path / "c.sqlite"))
+    cache.set("a", "x" * 100)
+    cache.set("b", "é" * 50)
+    cache.set("a", "x" * 10)
+    cache.delete("b")
+    cache.delete("missing")
+    assert cache.stats()["bytes"] == stored_bytes(cache) == len(json.dumps("x" * 10))
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+def test_max_bytes_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path / "c.sqlite"), max_bytes=250)
+    for key in "abc":
+        cache.set(key, "x" * 100)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] == stored_bytes(cache) <= 250
+    assert cache.evictions == 1
+
+def test_expired_entries_leave_the_total(tmp_path):
+    cache = DiskCache(str(tmp_path / "c.sqlite"))
+    cache.set("a", "x" * 100, ttl=-1)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+def test_total_is_rebuilt_for_caches_without_sizes(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)")
+    conn.execute("INSERT INTO entries VALUES ('a', ?, NULL, 0)", (json.dumps("é" * 10),))
+    conn.commit()
+    conn.close()
+    cache = DiskCache(path)
+    assert cache.stats()["bytes"] == len(json.dumps("é" * 10).encode("utf-8"))
+    assert cache.get("a") == "é" * 10
@@ -0,0 +1,66 @@
+import pytest
+from benchmarks.corpus import make_careers_page
+from benchmarks.fakes import FakeLLM
+from cache import DiskCache
+from chains import Chain, invoke_llm, merge_jobs, stream_llm
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "llm.sqlite"))
+
+def fake_llm(temperature):
+    return FakeLLM(temperature=temperature, first_token_latency=0, tokens_per_second=0, output_tokens=20)
+
+def test_deterministic_calls_are_cached(cache):
+    llm = fake_llm(0)
+    first = invoke_llm(llm, "Write a note", cache)
+    assert invoke_llm(llm, "Write a note", cache) == first
+    assert "".join(stream_llm(llm, "Write a note", cache)) == first
+    assert llm.calls == 1
+
+@pytest.mark.parametrize("call", [invoke_llm, lambda llm, prompt, cache: "".join(stream_llm(llm, prompt, cache))])
+def test_sampled_calls_skip_the_cache(cache, call):
+    llm = fake_llm(0.7)
+    call(llm, "Write a cover letter", cache)
+    call(llm, "Write a cover letter", cache)
+    assert llm.calls == 2
+    assert cache.stats()["entries"] == 0
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1):
+        self.acquired += tokens
+
+def test_limiter_is_acquired_per_model_request(cache):
+    limiter = CountingLimiter()
+    llm = fake_llm(0)
+    invoke_llm(llm, "Write a note", cache, limiter=limiter)
+    invoke_llm(llm, "Write a note", cache, limiter=limiter)
+    "".join(stream_llm(llm, "Write a note", cache, limiter=limiter))
+    assert limiter.acquired == 1
+    "".join(stream_llm(fake_llm(0.7), "Write a letter", cache, limiter=limiter))
+    assert limiter.acquired == 2
+
+def test_cascade_escalations_are_paced_too(cache):
+    chain = Chain(cache=cache)
+    chain.limiter = CountingLimiter()
+    chain.cascade.llm_factory = lambda model_name, temperature=0: FakeLLM(
+        model_name, temperature, first_token_latency=0, tokens_per_second=0, invalid_rate=1.0 if "8b" in model_name else 0.0)
+    chain.extract_jobs(make_careers_page(2, seed=4))
+    assert chain.limiter.acquired == 2
+
+def posting(role, description, **fields):
+    return {"role": role, "company_name": "Acme", "description": description, **fields}
+
+def test_merge_jobs_joins_a_posting_cut_at_a_window_edge():
+    full = posting("Data Engineer", "Build pipelines in Python and SQL for analytics.", experience="3 years")
+    cut = posting("Data Engineer", "Build pipelines in Python", experience="")
+    assert merge_jobs([cut, full]) == [full]
+
+def test_merge_jobs_keeps_postings_without_a_description_apart():
+    described = posting("Data Engineer", "Build pipelines in Python and SQL.")
+    bare = posting("Data Engineer", "")
+    assert merge_jobs([described, bare]) == [described, bare]
+    assert merge_jobs([bare, dict(bare)]) == [bare]
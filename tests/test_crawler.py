@@ -0,0 +1,80 @@
+import asyncio
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from crawler import Crawler, normalize_url
+
+SITE = {
+    "robots.txt": "User-agent: *\nDisallow: /jobs/secret\n",
+    "careers.html": """<html><body><h1>Careers</h1>
+        <a href="/jobs/1.html">Data Engineer</a>
+        <a href="/jobs/1.html?utm_source=newsletter">Data Engineer (again)</a>
+        <a href="/jobs/1.html#apply">Apply</a>
+        <a href="/jobs/secret.html">Internal role</a>
+        <a href="/about.html">About us</a>
+        <a href="/careers-2.html" rel="next">Next</a>
+    </body></html>""",
+    "careers-2.html": """<html><body><h1>Careers, page 2</h1>
+        <a href="/jobs/1.html">Data Engineer</a>
+        <a href="/jobs/2.html">ML Engineer</a>
+        <a href="/jobs/3.html">Designer</a>
+    </body></html>""",
+    "about.html": "<html><body>About</body></html>",
+    "jobs/1.html": "<html><body><h1>Data Engineer</h1></body></html>",
+    "jobs/2.html": "<html><body><h1>ML Engineer</h1></body></html>",
+    "jobs/3.html": "<html><body><h1>Designer</h1></body></html>",
+    "jobs/secret.html": "<html><body><h1>Internal role</h1></body></html>",
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path):
+    for name, body in SITE.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(body)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def crawl(seed, **options):
+    async def run():
+        async with Crawler(delay=0, **options) as crawler:
+            pages = [page async for page in crawler.crawl([seed])]
+        return pages, crawler.stats
+    return asyncio.run(run())
+
+def test_crawl_follows_pagination_dedups_and_honours_robots(site):
+    pages, stats = crawl(f"{site}/careers.html")
+    by_url = {page.url.removeprefix(site): page for page in pages}
+
+    assert sorted(by_url) == ["/careers-2.html", "/careers.html", "/jobs/1.html", "/jobs/2.html", "/jobs/3.html"]
+    assert len(pages) == len(by_url)
+    assert by_url["/careers.html"].kind == "seed"
+    assert by_url["/careers-2.html"].kind == "index"
+    assert {url for url, page in by_url.items() if page.kind == "posting"} == {"/jobs/1.html", "/jobs/2.html", "/jobs/3.html"}
+    # /jobs/1.html is linked three ways from the first page and again from the second
+    assert stats["duplicates"] >= 1
+    assert stats["robots_blocked"] == 1
+    assert stats["fetched"] == 5
+
+def test_crawl_stops_at_max_pages(site):
+    pages, stats = crawl(f"{site}/careers.html", max_pages=3)
+    assert len(pages) <= 3
+    assert stats["fetched"] + stats["robots_blocked"] <= 3
+
+def test_crawl_can_ignore_robots(site):
+    pages, stats = crawl(f"{site}/careers.html", respect_robots=False)
+    assert f"{site}/jobs/secret.html" in {page.url for page in pages}
+    assert stats["robots_blocked"] == 0
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80//a/b/?b=2&a=1&utm_source=x#frag") == "http://example.com/a/b?a=1&b=2"
+    assert normalize_url("../jobs/1", base="https://example.com/careers/list") == "https://example.com/jobs/1"
+    assert normalize_url("mailto:jobs@example.com") is None
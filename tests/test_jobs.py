@@ -0,0 +1,100 @@
+import threading
+import time
+import pytest
+from jobs import CANCELLED, DONE, FAILED, RUNNING, JobPool, QueueFull
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+@pytest.fixture
+def gate():
+    """A job that holds the pool's only worker until the test opens the gate."""
+    opened = threading.Event()
+    yield opened
+    opened.set()
+
+def block(pool, gate, owner="blocker"):
+    job = pool.submit(owner, lambda task: gate.wait(5))
+    wait_until(lambda: job.status == RUNNING)
+    return job
+
+def test_owners_are_served_round_robin(gate):
+    pool = JobPool(workers=1, max_per_owner=5)
+    block(pool, gate)
+    order = []
+
+    def record(name):
+        return lambda task: order.append(name)
+
+    jobs = [pool.submit("a", record(f"a{i}")) for i in range(3)] + [pool.submit("b", record(f"b{i}")) for i in range(2)]
+    assert pool.position(jobs[3].id) == 1  # b0 waits only for a0
+    gate.set()
+    wait_until(lambda: all(job.status == DONE for job in jobs))
+    assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+def test_result_partial_output_and_failure():
+    pool = JobPool(workers=1)
+
+    def work(task):
+        task.update(stage="half way")
+        return 42
+
+    done = pool.submit("a", work, kind="test")
+    failed = pool.submit("a", lambda task: 1 / 0)
+    wait_until(lambda: failed.status == FAILED)
+    snapshot = done.snapshot()
+    assert (snapshot["status"], snapshot["result"], snapshot["partial"], snapshot["kind"]) == (DONE, 42, {"stage": "half way"}, "test")
+    assert failed.error.startswith("ZeroDivisionError")
+
+def test_cancel_drops_a_queued_job_at_once(gate):
+    pool = JobPool(workers=1)
+    block(pool, gate)
+    ran = []
+    queued = pool.submit("a", lambda task: ran.append(True))
+    pool.cancel(queued.id)
+    assert queued.status == CANCELLED
+    assert pool.stats()["queued"] == 0
+    gate.set()
+    time.sleep(0.1)
+    assert not ran
+
+def test_cancel_stops_a_running_job_at_its_next_check():
+    pool = JobPool(workers=1)
+    started, steps = threading.Event(), []
+
+    def work(task):
+        started.set()
+        for step in range(500):
+            task.check()
+            steps.append(step)
+            time.sleep(0.01)
+
+    job = pool.submit("a", work)
+    started.wait(5)
+    pool.cancel(job.id)
+    wait_until(lambda: job.status == CANCELLED)
+    assert len(steps) < 500 and job.result is None and job.error is None
+
+def test_queue_limits(gate):
+    pool = JobPool(workers=1, max_queued=3, max_per_owner=2)
+    block(pool, gate)
+    pool.submit("a", lambda task: None)
+    pool.submit("a", lambda task: None)
+    with pytest.raises(QueueFull):
+        pool.submit("a", lambda task: None)
+    pool.submit("b", lambda task: None)
+    with pytest.raises(QueueFull):
+        pool.submit("c", lambda task: None)
+    assert pool.stats()["queued"] == 3
+
+def test_finished_jobs_are_kept_for_a_while_then_pruned():
+    pool = JobPool(workers=1, keep_finished=0.05)
+    job = pool.submit("a", lambda task: "done")
+    wait_until(lambda: job.status == DONE)
+    assert pool.get(job.id) is job
+    time.sleep(0.1)
+    pool.submit("a", lambda task: None)
+    assert pool.get(job.id) is None
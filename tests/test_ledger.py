@@ -0,0 +1,61 @@
+import random
+import pytest
+from benchmarks.corpus import make_posting, repost
+from ledger import Ledger, minhash, posting_text, similarity
+
+TEMPLATE = (
+    "Acme builds logistics software used by thousands of warehouses around the world. We are a remote first "
+    "company with offices in Berlin, Austin and Singapore. We offer competitive salaries, equity, a learning "
+    "budget, generous parental leave and flexible hours. Our teams are small, autonomous and own their services "
+    "end to end, from design to production. We value clear writing, kind code review and shipping often. "
+    "Acme is an equal opportunity employer and welcomes applicants from every background. "
+)
+
+def sibling(role, duties, skills):
+    return {"role": role, "company_name": "Acme", "description": TEMPLATE + duties, "skills": skills}
+
+@pytest.fixture
+def ledger(tmp_path):
+    return Ledger(str(tmp_path / "ledger.sqlite"))
+
+def test_exact_and_reposted_postings_are_found(ledger):
+    rng = random.Random(0)
+    job = make_posting(rng, 1)
+    posting_id = ledger.record(job, url="https://example.com/jobs/1", result={"cold_email": "Hi"})
+
+    exact = ledger.find(dict(job))
+    assert exact["id"] == posting_id and exact["match"] == "exact"
+    assert exact["result"] == {"cold_email": "Hi"}
+
+    near = ledger.find(repost(rng, job))
+    assert near["id"] == posting_id and near["match"] == "near"
+    assert near["similarity"] >= ledger.threshold
+
+def test_sibling_roles_with_a_templated_description_are_not_duplicates(ledger):
+    backend = sibling("Backend Engineer", "You will build our routing APIs in Python.", ["Python", "PostgreSQL"])
+    frontend = sibling("Frontend Engineer", "You will build our dashboard in TypeScript.", ["TypeScript", "React"])
+    # The shared template alone puts them over the similarity threshold
+    assert similarity(minhash(posting_text(backend)), minhash(posting_text(frontend))) >= ledger.threshold
+
+    ledger.record(backend, url="https://acme.example/jobs/backend", result={"cold_email": "Backend email"})
+    assert ledger.find(frontend) is None
+    assert ledger.record(frontend, url="https://acme.example/jobs/frontend") != ledger.find(backend)["id"]
+    assert ledger.stats()["postings"] == 2
+
+def test_same_posting_for_a_different_company_is_not_a_duplicate(ledger):
+    acme = {"role": "Data Engineer", "company_name": "Acme Corp", "description": TEMPLATE, "skills": ["Python"]}
+    globex = {**acme, "company_name": "Globex"}
+    assert similarity(minhash(posting_text(acme)), minhash(posting_text(globex))) >= ledger.threshold
+
+    acme_id = ledger.record(acme, url="https://acme.example/jobs/1", result={"cold_email": "Acme email"})
+    assert ledger.find(globex) is None
+    globex_id = ledger.record(globex, url="https://globex.example/jobs/1", result={"cold_email": "Globex email"})
+    assert globex_id != acme_id
+    assert ledger.find(acme)["result"] == {"cold_email": "Acme email"}
+    assert ledger.find({**acme, "company_name": "ACME corp."})["id"] == acme_id
+
+def test_disabled_ledger_never_matches(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.sqlite"), enabled=False)
+    job = make_posting(random.Random(0), 1)
+    assert ledger.record(job) is None
+    assert ledger.find(job) is None
@@ -0,0 +1,57 @@
+import pytest
+from benchmarks.fakes import FakeServer, GmailHandler
+from outbox import GmailService, Outbox, OutboxWorker
+
+@pytest.fixture
+def gmail_server():
+    server = FakeServer(GmailHandler, sent=[])
+    yield server
+    server.close()
+
+@pytest.fixture
+def worker(tmp_path, gmail_server):
+    outbox = Outbox(path=str(tmp_path / "outbox.sqlite"))
+    worker = OutboxWorker(outbox, GmailService(api_endpoint=gmail_server.url), poll_interval=0.05)
+    worker.start()
+    yield worker
+    worker.stop()
+    worker.join(timeout=5)
+
+def send(worker, body, resend=False):
+    message_id = worker.outbox.enqueue("recruiter@example.com", "me@example.com", "Hello", body, resend=resend)
+    worker.wake()
+    return worker.outbox.wait_for(message_id, timeout=10, interval=0.02)
+
+def test_worker_sends_then_stops_and_joins(worker, gmail_server):
+    record = send(worker, "Body")
+    assert record["status"] == "sent"
+    assert record["gmail_id"]
+    assert len(gmail_server.handler.sent) == 1
+
+    worker.stop()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+
+def test_identical_message_is_sent_once_unless_resend(worker, gmail_server):
+    first = send(worker, "Same body")
+    assert send(worker, "Same body")["id"] == first["id"]
+    assert len(gmail_server.handler.sent) == 1
+
+    again = send(worker, "Same body", resend=True)
+    assert again["status"] == "sent"
+    assert len(gmail_server.handler.sent) == 2
+
+def test_failed_send_is_retried_with_backoff(tmp_path):
+    class Failing:
+        def send_batch(self, raw_messages):
+            return [ConnectionError("connection reset")] * len(raw_messages)
+
+    outbox = Outbox(path=str(tmp_path / "outbox.sqlite"), base_backoff=60)
+    message_id = outbox.enqueue("recruiter@example.com", "me@example.com", "Hello", "Body")
+    assert OutboxWorker(outbox, Failing()).process_once() == 1
+    record = outbox.get(message_id)
+    assert record["status"] == "pending"
+    assert record["attempts"] == 1
+    assert "connection reset" in record["last_error"]
+    # Not due again until the backoff has passed
+    assert OutboxWorker(outbox, Failing()).process_once() == 0
@@ -0,0 +1,48 @@
+import pytest
+import requests
+from benchmarks.corpus import make_careers_page
+from benchmarks.fakes import FakeServer, SiteHandler
+from cache import DiskCache
+from pages import PageCache
+
+@pytest.fixture
+def site():
+    server = FakeServer(SiteHandler, pages={"careers": make_careers_page(3, seed=1)})
+    yield server
+    server.close()
+
+def page_cache(tmp_path, fresh_for):
+    return PageCache(cache=DiskCache(str(tmp_path / "pages.sqlite"), max_bytes=1024 * 1024), fresh_for=fresh_for)
+
+def test_fresh_pages_skip_the_request(site, tmp_path):
+    pages = page_cache(tmp_path, fresh_for=300)
+    first = pages.load(f"{site.url}/careers.html")
+    assert pages.load(f"{site.url}/careers.html") == first
+    stats = pages.stats()
+    assert (stats["misses"], stats["fresh"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 1
+
+def test_unchanged_page_revalidates_with_etag(site, tmp_path):
+    pages = page_cache(tmp_path, fresh_for=0)
+    url = f"{site.url}/careers.html"
+    first = pages.load(url)
+    assert pages.cache.get(f"page:{url}")["etag"]
+    assert pages.load(url) == first
+    assert pages.stats()["revalidated"] == 1
+
+    site.handler.pages = {"careers": make_careers_page(5, seed=2)}
+    assert pages.load(url) != first
+    stats = pages.stats()
+    assert (stats["misses"], stats["revalidated"], stats["changed"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+def test_stored_copy_is_served_when_the_site_is_down(site, tmp_path):
+    pages = page_cache(tmp_path, fresh_for=0)
+    url = f"{site.url}/careers.html"
+    first = pages.load(url)
+    site.close()
+    assert pages.load(url) == first
+    assert pages.stats()["stale"] == 1
+    with pytest.raises(requests.RequestException):
+        pages.load(f"{site.url}/other.html")
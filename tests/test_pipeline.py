@@ -0,0 +1,126 @@
+import threading
+import pytest
+from benchmarks.corpus import RESUME_TEXT, make_careers_page
+from benchmarks.fakes import FakeLLM, FakeServer, HunterHandler, SiteHandler
+from cache import DiskCache
+from chains import Chain, IndividualChain
+from checkpoints import CheckpointStore
+from hunter import HunterClient
+from ledger import Ledger
+from pipeline import StageGraph, checkpoint_key, individual_pipeline, organization_outreach
+from resume import ResumeParser
+
+def fake_llm(model_name="fake", temperature=0):
+    return FakeLLM(model_name, temperature, first_token_latency=0, tokens_per_second=0, output_tokens=30)
+
+@pytest.fixture
+def servers():
+    site = FakeServer(SiteHandler, pages={"job": make_careers_page(1, seed=3)})
+    hunter = FakeServer(HunterHandler)
+    yield site, hunter
+    site.close()
+    hunter.close()
+
+@pytest.fixture
+def chain(tmp_path, servers):
+    chain = IndividualChain(cache=DiskCache(str(tmp_path / "llm.sqlite")))
+    chain.cascade.llm_factory = fake_llm
+    chain.client = fake_llm("fake-8b", 0.7)
+    chain.hunter = HunterClient(api_key="test", base_url=f"{servers[1].url}/v2",
+                                cache=DiskCache(str(tmp_path / "hunter.sqlite")), rate_per_minute=0)
+    return chain
+
+def read_resume():
+    return ResumeParser(cache=DiskCache(":memory:", enabled=False)).parse(RESUME_TEXT.encode("utf-8"), "text/plain")
+
+@pytest.mark.parametrize("use_ledger", [False, True])
+def test_checkpoint_key_matches_the_pipeline_stages(tmp_path, servers, chain, use_ledger):
+    store = CheckpointStore(DiskCache(str(tmp_path / "checkpoints.sqlite")))
+    ledger = Ledger(str(tmp_path / "ledger.sqlite")) if use_ledger else None
+    results = individual_pipeline(chain, f"{servers[0].url}/job.html", read_resume, ledger=ledger).run(checkpoints=store)
+
+    letter_key = checkpoint_key(store, chain, "cover_letter", job=results["job"], resume=results["resume"])
+    assert store.load(letter_key) == (True, results["cover_letter"])
+    email_key = checkpoint_key(store, chain, "cold_email", job=results["job"], applicant=results["applicant"],
+                               cover_letter=results["cover_letter"])
+    assert store.load(email_key) == (True, results["cold_email"])
+
+# ----------------- STAGE GRAPH -----------------
+def test_stage_graph_passes_dependency_results_in_declared_order():
+    graph = StageGraph()
+    graph.add("a", lambda: 2)
+    graph.add("b", lambda: 3)
+    graph.add("product", lambda b, a: a * b * 10 + b, deps=["b", "a"])
+    assert graph.run() == {"a": 2, "b": 3, "product": 63}
+
+def test_stage_graph_runs_independent_stages_concurrently():
+    both_started = threading.Barrier(2, timeout=5)
+    graph = StageGraph()
+    graph.add("left", lambda: both_started.wait() is not None)
+    graph.add("right", lambda: both_started.wait() is not None)
+    assert graph.run(max_workers=2) == {"left": True, "right": True}
+
+def test_stage_graph_failure_fails_only_downstream_stages():
+    calls = []
+    graph = StageGraph()
+    graph.add("page", lambda: calls.append("page") or "html")
+    graph.add("job", lambda page: 1 / 0, deps=["page"])
+    graph.add("letter", lambda job: calls.append("letter"), deps=["job"])
+    graph.add("email", lambda letter: calls.append("email"), deps=["letter"])
+    graph.add("resume", lambda: "resume")
+    run = graph.start()
+
+    assert run.result("resume") == "resume"
+    for name in ("job", "letter", "email"):
+        with pytest.raises(ZeroDivisionError):
+            run.result(name, timeout=5)
+    assert calls == ["page"]
+    with pytest.raises(ZeroDivisionError):
+        run.wait()
+
+def test_stage_graph_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError, match="cycle"):
+        StageGraph().add("a", lambda b: b, deps=["b"]).add("b", lambda a: a, deps=["a"]).start()
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph().add("a", lambda b: b, deps=["missing"]).start()
+
+def test_stage_graph_restores_versioned_stages_from_checkpoints(tmp_path):
+    store = CheckpointStore(DiskCache(str(tmp_path / "checkpoints.sqlite")))
+    calls = []
+
+    def graph(version):
+        return (StageGraph()
+                .add("text", lambda: "page text")
+                .add("jobs", lambda text: calls.append(text) or [text.upper()], deps=["text"], version=version))
+
+    assert graph("v1").run(checkpoints=store)["jobs"] == ["PAGE TEXT"]
+    run = graph("v1").start(checkpoints=store)
+    assert run.wait()["jobs"] == ["PAGE TEXT"] and run.restored == {"jobs"}
+    graph("v2").run(checkpoints=store)
+    assert len(calls) == 2
+
+
+class Links:
+    def query_links(self, skills):
+        return ["https://portfolio.example/1"]
+
+def test_organization_outreach_streams_each_email(tmp_path, servers):
+    chain = Chain(cache=DiskCache(str(tmp_path / "llm.sqlite")))
+    chain.llm = fake_llm("fake-70b", 0)
+    hunter = HunterClient(api_key="test", base_url=f"{servers[1].url}/v2",
+                          cache=DiskCache(str(tmp_path / "hunter.sqlite")), rate_per_minute=0)
+    jobs = [{"role": f"Role {i}", "company_name": "Acme", "skills": ["python"], "description": f"Job {i}"} for i in range(3)]
+    drafts = {}
+    lock = threading.Lock()
+
+    def on_text(i, text):
+        with lock:
+            assert text.startswith(drafts.get(i, ""))
+            drafts[i] = text
+
+    results = dict(organization_outreach(chain, Links(), hunter, jobs, on_text=on_text))
+    assert sorted(results) == [0, 1, 2]
+    for i, result in results.items():
+        assert result["error"] is None
+        assert result["email"] == drafts[i].strip()
+        assert result["email"] == chain.write_mail(jobs[i], result["links"])
@@ -0,0 +1,23 @@
+import time
+import pytest
+from ratelimit import RateLimiter
+
+def test_zero_rate_is_unlimited():
+    limiter = RateLimiter(0)
+    for _ in range(1000):
+        limiter.acquire(50)
+
+def test_burst_is_served_at_once_then_paced():
+    limiter = RateLimiter(20, burst=5)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.05
+    limiter.acquire(2)
+    assert time.monotonic() - started >= 0.08
+
+def test_acquire_more_than_burst_raises_instead_of_hanging():
+    # per_minute(60) defaults to a bucket of one token
+    with pytest.raises(ValueError):
+        RateLimiter.per_minute(60).acquire(2)
+    RateLimiter.per_minute(60, burst=2).acquire(2)
@@ -0,0 +1,91 @@
+import json
+import pytest
+from cache import DiskCache
+from chains import Chain
+from routing import LARGE_MODEL, SMALL_MODEL, ModelCascade, RoutePolicy, ValidationError, validate_job, validate_jobs
+
+class Models:
+    """Canned responses per model name; records which models were asked."""
+
+    def __init__(self, **responses):
+        self.responses = {SMALL_MODEL: responses.get("small"), LARGE_MODEL: responses.get("large")}
+        self.asked = []
+
+    def factory(self, model_name, temperature=0):
+        return model_name
+
+    def invoke(self, model_name, prompt):
+        self.asked.append(model_name)
+        response = self.responses[model_name]
+        return response(prompt) if callable(response) else response
+
+def cascade(models, **options):
+    return ModelCascade(models.invoke, llm_factory=models.factory, enabled=True, **options)
+
+GOOD = json.dumps([{"role": "Data Engineer", "skills": ["Python"]}])
+WRONG_KEYS = json.dumps([{"Role": "Data Engineer", "Company Name": "Acme"}])
+
+def test_valid_small_model_output_is_not_escalated():
+    models = Models(small=GOOD, large=GOOD)
+    router = cascade(models)
+    assert router.run("jobs", "prompt", json.loads, validate_jobs) == json.loads(GOOD)
+    assert models.asked == [SMALL_MODEL]
+    assert router.stats()["jobs"]["served_by"] == {SMALL_MODEL: 1}
+
+@pytest.mark.parametrize("small", [WRONG_KEYS, "not json", "[]"])
+def test_invalid_unparseable_or_empty_output_escalates(small):
+    models = Models(small=small, large=GOOD)
+    router = cascade(models)
+    assert router.run("jobs", "prompt", json.loads, validate_jobs) == json.loads(GOOD)
+    assert models.asked == [SMALL_MODEL, LARGE_MODEL]
+    assert router.stats()["jobs"]["escalation_rate"] == 1.0
+
+def test_last_model_parse_error_is_raised_and_counted():
+    router = cascade(Models(small="nope", large="still nope"))
+    with pytest.raises(ValueError):
+        router.run("jobs", "prompt", json.loads, validate_jobs)
+    assert router.stats()["jobs"]["failures"] == 1
+
+def test_last_model_output_is_returned_even_if_it_fails_validation():
+    models = Models(small=WRONG_KEYS, large=WRONG_KEYS)
+    assert cascade(models).run("jobs", "prompt", json.loads, validate_jobs) == json.loads(WRONG_KEYS)
+
+def test_empty_output_can_be_accepted_and_escalated_later():
+    models = Models(small="[]", large=GOOD)
+    router = cascade(models)
+    assert router.run("jobs", "prompt", json.loads, validate_jobs, escalate_on_empty=False) == []
+    assert router.run("jobs", "prompt", json.loads, validate_jobs, first=1) == json.loads(GOOD)
+    assert models.asked == [SMALL_MODEL, LARGE_MODEL]
+    assert router.stats()["jobs"]["escalations"] == 1
+
+def windowed_chain(models):
+    chain = Chain(cache=DiskCache(":memory:", enabled=False))
+    chain.cascade = cascade(models)
+    return chain
+
+PAGE = " ".join(f"word{i}" for i in range(4000))
+
+def test_a_page_with_empty_windows_is_not_escalated_window_by_window():
+    models = Models(small=lambda prompt: GOOD if "word0 " in prompt else "[]", large=GOOD)
+    jobs = windowed_chain(models).extract_jobs(PAGE, window_tokens=1000, overlap_tokens=0)
+    assert jobs == json.loads(GOOD)
+    assert set(models.asked) == {SMALL_MODEL}
+
+def test_a_page_with_no_jobs_in_any_window_is_escalated_once():
+    models = Models(small="[]", large=GOOD)
+    windowed_chain(models).extract_jobs(PAGE, window_tokens=1000, overlap_tokens=0)
+    windows = models.asked.count(SMALL_MODEL)
+    assert windows > 1
+    assert models.asked.count(LARGE_MODEL) == windows
+
+def test_long_prompts_and_a_disabled_cascade_go_straight_to_the_large_model():
+    models = Models(small=GOOD, large=GOOD)
+    cascade(models, policies={"jobs": RoutePolicy(max_prompt_tokens=10)}).run("jobs", "x" * 100, json.loads)
+    ModelCascade(models.invoke, llm_factory=models.factory, enabled=False).run("jobs", "prompt", json.loads)
+    assert models.asked == [LARGE_MODEL, LARGE_MODEL]
+
+def test_validate_job():
+    assert validate_job({"role": "Designer", "skills": "Figma"})
+    for bad in ([], {"Role": "Designer"}, {"company_name": "Acme"}, {"role": "Designer", "skills": 3}):
+        with pytest.raises(ValidationError):
+            validate_job(bad)
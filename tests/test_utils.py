@@ -0,0 +1,58 @@
+from utils import extract_page_text, find_emails, split_into_windows
+
+PAGE = """<html><body>
+<nav><a href="/">Home</a></nav>
+<div class="cookie-banner">We use cookies</div>
+<div id="share-bar">Share on LinkedIn</div>
+<div class="shared-layout">
+  <main>
+    <h1>Data Engineer</h1>
+    <section class="social-impact-role"><p>Help nonprofits use their data.</p></section>
+    <ul><li>Python</li><li>SQL</li></ul>
+    <p>Questions? <a href="mailto:jobs@acme.io">Email us</a></p>
+  </main>
+</div>
+<footer>Copyright Acme</footer>
+</body></html>"""
+
+def test_extract_page_text_keeps_content_and_drops_boilerplate():
+    text = extract_page_text(PAGE)["text"]
+    assert "# Data Engineer" in text
+    assert "Help nonprofits use their data." in text
+    assert "- Python" in text and "- SQL" in text
+    assert "jobs@acme.io" in text
+    for boilerplate in ("We use cookies", "Share on LinkedIn", "Home", "Copyright"):
+        assert boilerplate not in text
+
+def test_extract_page_text_never_strips_the_content_root_or_its_wrappers():
+    html = ('<body><form id="aspnetForm"><div class="modal-host"><article><h2>Nurse</h2>'
+            '<p>Night shifts.</p></article></div><button>Apply</button></form></body>')
+    text = extract_page_text(html)["text"]
+    assert "## Nurse" in text and "Night shifts." in text
+    assert "Apply" not in text
+
+def test_split_into_windows_overlaps_and_covers_every_word():
+    words = [f"w{i}" for i in range(2000)]
+    windows = split_into_windows(" ".join(words), max_tokens=200, overlap_tokens=20)
+    assert len(windows) > 1
+    assert windows[0].split()[0] == "w0" and windows[-1].split()[-1] == "w1999"
+    for previous, current in zip(windows, windows[1:]):
+        assert current.split()[0] in previous.split()
+
+def test_find_emails_skips_system_addresses():
+    assert find_emails("Write to noreply@acme.io or jane.doe@acme.io, jane.doe@acme.io") == ["jane.doe@acme.io"]
+
+def test_extract_page_text_keeps_every_article_on_a_careers_index():
+    cards = "".join(f'<article class="job"><h2>Role {i}</h2><p>Desc {i}</p></article>' for i in range(5))
+    html = f'<body><div class="cookie-banner">Cookies</div><div class="listing"><h1>Open roles</h1>{cards}</div></body>'
+    text = extract_page_text(html)["text"]
+    for i in range(5):
+        assert f"## Role {i}\nDesc {i}" in text
+    assert "# Open roles" in text and "Cookies" not in text
+
+def test_extract_page_text_keeps_a_posting_inside_a_modal_state_wrapper():
+    html = ('<body><div class="modal-open page"><h1>Designer</h1><ul><li>Figma</li></ul></div>'
+            '<div role="dialog">Sign up for alerts</div></body>')
+    text = extract_page_text(html)["text"]
+    assert "# Designer" in text and "- Figma" in text
+    assert "Sign up" not in text
@@ -0,0 +1,182 @@
+# ================== tracing.py (Spans & Token Accounting) ==================
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from cache import CACHE_DIR
+
+# One JSON span per line, using OpenTelemetry's span field names
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(CACHE_DIR, "traces.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACING = os.getenv("TRACING", "on").lower() not in ("off", "0", "false")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+# ----------------- EXPORT -----------------
+class JsonlExporter:
+    """Appends finished spans to a JSONL file, rolling it over to `<path>.1` past `max_bytes`."""
+
+    def __init__(self, path=TRACE_FILE, max_bytes=TRACE_MAX_BYTES, enabled=TRACING):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        if not self.enabled:
+            return
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"Trace export error: {e}")
+
+exporter = JsonlExporter()
+
+# ----------------- SPANS -----------------
+class Span:
+    def __init__(self, name, trace=None, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.trace_id = trace.trace_id if trace else (parent.trace_id if parent else uuid.uuid4().hex)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def end(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.trace is not None:
+            self.trace.add(self)
+        exporter.export(self)
+
+    def to_dict(self):
+        end_time = self.start_time + (self.duration or 0.0)
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": int(self.start_time * 1e9),
+            "endTimeUnixNano": int(end_time * 1e9),
+            "durationMs": round((self.duration or 0.0) * 1000, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+def start_span(name, **attributes):
+    """Start a span under the current one without making it current; call `end()` when done.
+
+    Used where the work is interleaved with the caller, such as a streamed LLM response.
+    """
+    return Span(name, _current_trace.get(), _current_span.get(), attributes)
+
+@contextmanager
+def span(name, **attributes):
+    """Time the enclosed block as a child of the current span; errors are recorded and re-raised."""
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+def current_span():
+    return _current_span.get()
+
+def wrap(fn):
+    """Bind `fn` to the caller's trace context, for work handed to another thread."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call gets its own copy
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+# ----------------- TRACES -----------------
+class Trace:
+    """All spans recorded during one user action or batch job."""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def rows(self):
+        """Finished spans in start order, flattened for display."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_time)
+        names = {s.span_id: s.name for s in spans}
+        return [
+            {
+                "span": s.name,
+                "parent": names.get(s.parent_id, ""),
+                "ms": round((s.duration or 0.0) * 1000, 1),
+                **s.attributes,
+                "error": s.error or "",
+            }
+            for s in spans
+        ]
+
+    def summary(self):
+        """Per span name: count, total time, LLM tokens, cache hits and errors."""
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            entry = totals.setdefault(s.name, {"count": 0, "total_ms": 0.0, "prompt_tokens": 0,
+                                               "completion_tokens": 0, "cache_hits": 0, "errors": 0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + (s.duration or 0.0) * 1000, 1)
+            entry["prompt_tokens"] += s.attributes.get("prompt_tokens", 0)
+            entry["completion_tokens"] += s.attributes.get("completion_tokens", 0)
+            entry["cache_hits"] += bool(s.attributes.get("cache_hit"))
+            entry["errors"] += s.error is not None
+        return totals
+
+@contextmanager
+def trace(name, **attributes):
+    """Start a new trace with a root span named `name`; yields the Trace collecting its spans."""
+    collected = Trace(name)
+    trace_token = _current_trace.set(collected)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, **attributes):
+            yield collected
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
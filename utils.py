@@ -1,4 +1,23 @@
 import re
+from bs4 import BeautifulSoup
+
+# Elements that never carry job-posting content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "nav", "footer", "aside", "form", "button"]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "dialog", "search"}
+# Matched against whole id/class tokens, optionally followed by a -suffix ("cookie-banner"), so
+# containers like "shared-layout" or "social-impact-role" are kept. Modals and popups are left to
+# role="dialog": state classes such as "modal-open" often sit on the page wrapper itself.
+BOILERPLATE_HINT = re.compile(
+    r"^(?:cookies?|consent|gdpr|newsletter|breadcrumbs?|navbar|site-header|site-footer|share-bar|share-buttons"
+    r"|social-share|social-links|social-icons)(?:[-_].*)?$",
+    re.I,
+)
+
+def is_boilerplate(tag):
+    if tag.get("role") in BOILERPLATE_ROLES:
+        return True
+    tokens = (tag.get("id") or "").split() + (tag.get("class") or [])
+    return any(BOILERPLATE_HINT.match(token) for token in tokens)
 
 def clean_text(text):
     # Remove HTML tags
@@ -13,4 +32,97 @@ def clean_text(text):
     text = text.strip()
     # Remove extra whitespace
     text = ' '.join(text.split())
-    return text
\ No newline at end of file
+    return text
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text with the Llama 3 tokenizer
+    return (len(text) + 3) // 4
+
+def split_into_windows(text, max_tokens=3000, overlap_tokens=300):
+    """Split text into overlapping word-aligned windows of at most ~max_tokens tokens each."""
+    words = text.split()
+    if not words:
+        return []
+    windows = []
+    start = 0
+    while start < len(words):
+        end, size = start, 0
+        while end < len(words) and (size == 0 or size + estimate_tokens(words[end] + " ") <= max_tokens):
+            size += estimate_tokens(words[end] + " ")
+            end += 1
+        windows.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        # Step back far enough to repeat ~overlap_tokens worth of words in the next window
+        back, overlap = end, 0
+        while back > start + 1 and overlap < overlap_tokens:
+            back -= 1
+            overlap += estimate_tokens(words[back] + " ")
+        start = back
+    return windows
+
+def normalize_text(text):
+    return " ".join(re.sub(r'[^a-z0-9 ]', ' ', str(text or '').lower()).split())
+
+
+def content_root(soup):
+    """The element holding the page's content: <main>, else the one <article>, else the element
+    enclosing all the <article>s (a careers index has one per posting), else <body>."""
+    root = soup.find("main") or soup.find(attrs={"role": "main"})
+    if root is None:
+        articles = soup.find_all("article")
+        if len(articles) == 1:
+            root = articles[0]
+        elif articles:
+            others = [{id(parent) for parent in article.parents} for article in articles[1:]]
+            root = next((parent for parent in articles[0].parents if all(id(parent) in ids for ids in others)), None)
+    return root or soup.body or soup
+
+def extract_page_text(html):
+    """Reduce a job page's HTML to its main content, keeping headings, bullets, emails and phone numbers.
+
+    Returns a dict with the extracted text and the estimated token counts of the
+    full page text before extraction and of the extracted text after it.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    tokens_before = estimate_tokens(" ".join(soup.get_text(" ").split()))
+
+    root = content_root(soup)
+    # The content root and whatever wraps it (say, a page-wide <form>) are never stripped
+    keep = {id(root)} | {id(parent) for parent in root.parents}
+
+    for tag in soup(BOILERPLATE_TAGS):
+        if id(tag) not in keep:
+            tag.decompose()
+    for tag in soup.find_all(True):
+        if not tag.decomposed and id(tag) not in keep and is_boilerplate(tag):
+            tag.decompose()
+
+    # Mark structure with plain-text equivalents before flattening
+    for level in range(1, 7):
+        for heading in root.find_all(f"h{level}"):
+            heading.insert_before("\n" + "#" * level + " ")
+            heading.insert_after("\n")
+    for item in root.find_all("li"):
+        item.insert_before("\n- ")
+    for link in root.find_all("a", href=True):
+        if link["href"].startswith("mailto:") and "@" not in link.get_text():
+            link.append(f" ({link['href'][7:].split('?')[0]})")
+    for br in root.find_all("br"):
+        br.replace_with("\n")
+    for block in root.find_all(["p", "div", "section", "tr", "ul", "ol", "table", "header"]):
+        block.insert_after("\n")
+
+    lines = []
+    for line in root.get_text().split("\n"):
+        line = " ".join(line.split())
+        if line and line not in ("-", "#") and (not lines or line != lines[-1]):
+            lines.append(line)
+    text = "\n".join(lines)
+    return {"text": text, "tokens_before": tokens_before, "tokens_after": estimate_tokens(text)}
+
+def find_emails(text):
+    """Email addresses in `text` that look like a person or recruiting inbox rather than a system address."""
+    emails = re.findall(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]*[a-zA-Z]", text or "")
+    skip = ("noreply", "no-reply", "donotreply", "privacy", "example.")
+    return [e for e in dict.fromkeys(emails) if not any(s in e.lower() for s in skip)]